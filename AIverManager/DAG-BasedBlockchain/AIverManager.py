@@ -14,8 +14,14 @@
 # 	2.	DAG Structure:
 # 		- Nodes represent individual algorithm versions.
 # 		- Each node can reference one or more parent nodes, ensuring dependency tracking.
+# 		- Nodes are indexed by hash, by identity name, and by their parents and children,
+# 		  so lookups and ancestor / descendant walks do not scan the node list.
 # 	3.	Validation:
 # 		- Ensures the graph is acyclic.
+# 		- validate_dag() audits every edge with an iterative depth-first search and
+# 		  find_cycle() reports the offending cycle, if any.
+# 		- add_node keeps a topological order (a parent always precedes its children), so
+# 		  validate_dag(incremental=True) opts in to only checking the nodes added since the last one.
 # 		- Verifies parent dependencies exist before adding new nodes.
 # 	4.	Extensibility:
 # 		- New metadata fields can be added to Aladapter as needed.
@@ -23,6 +29,7 @@
 
 import hashlib
 import time
+from collections import deque
 from typing import List, Dict
 
 
@@ -91,7 +98,12 @@ class DAGBlockchain:
         Initializes the DAG blockchain.
         """
         self.nodes = []  # List of all DAG nodes
-        self.edges = {}  # Adjacency list for the DAG
+        self.edges = {}  # Adjacency list for the DAG: parent hash -> child hashes
+        self.node_index = {}  # hash -> DAGNode
+        self.parent_edges = {}  # child hash -> parent hashes
+        self.identities = {}  # identity name -> DAGNodes, in insertion order
+        self.order = {}  # hash -> position in a topological order of the DAG
+        self.validated = 0  # number of nodes (in order) checked by validate_dag
 
     def add_node(self, aladapter, parent_hashes):
         """
@@ -101,12 +113,19 @@ class DAGBlockchain:
         """
         # Ensure all parent hashes exist
         for parent_hash in parent_hashes:
-            if parent_hash not in {node.hash for node in self.nodes}:
+            if parent_hash not in self.node_index:
                 raise ValueError(f"Parent hash {parent_hash} does not exist in the DAG.")
 
         # Create the new node
         new_node = DAGNode(aladapter, parent_hashes)
+        if new_node.hash in self.node_index:
+            raise ValueError(f"Node {new_node.hash} already exists in the DAG.")
         self.nodes.append(new_node)
+        self.node_index[new_node.hash] = new_node
+        # Parents already exist, so appending keeps the order topological
+        self.order[new_node.hash] = len(self.order)
+        self.parent_edges[new_node.hash] = list(parent_hashes)
+        self.identities.setdefault(aladapter.identity_name, []).append(new_node)
 
         # Update the DAG structure
         for parent_hash in parent_hashes:
@@ -116,31 +135,103 @@ class DAGBlockchain:
 
         return new_node
 
-    def validate_dag(self):
+    def get_node(self, node_hash):
         """
-        Validates the DAG to ensure there are no cycles.
+        Returns the node with the given hash, or None.
         """
-        visited = set()
-        stack = set()
+        return self.node_index.get(node_hash)
 
-        def visit(node_hash):
-            if node_hash in stack:
-                return False  # Cycle detected
-            if node_hash in visited:
-                return True
+    def get_nodes_by_identity(self, identity_name):
+        """
+        Returns the nodes of an identity name, in insertion order.
+        """
+        return list(self.identities.get(identity_name, []))
 
-            stack.add(node_hash)
-            visited.add(node_hash)
-            for child_hash in self.edges.get(node_hash, []):
-                if not visit(child_hash):
+    def children(self, node_hash):
+        """
+        Returns the nodes that list the given node as a parent.
+        """
+        return [self.node_index[child_hash] for child_hash in self.edges.get(node_hash, [])]
+
+    def parents(self, node_hash):
+        """
+        Returns the parent nodes of the given node.
+        """
+        return [self.node_index[parent_hash] for parent_hash in self.parent_edges.get(node_hash, [])]
+
+    def walk(self, node_hash, adjacency):
+        """
+        Breadth-first walk from a node along an adjacency index, nearest nodes first.
+        The start node itself is not included.
+        """
+        seen = {node_hash}
+        queue = deque([node_hash])
+        found = []
+        while queue:
+            for next_hash in adjacency.get(queue.popleft(), ()):
+                if next_hash not in seen:
+                    seen.add(next_hash)
+                    queue.append(next_hash)
+                    found.append(self.node_index[next_hash])
+        return found
+
+    def ancestors(self, node_hash):
+        """
+        Returns every node the given node depends on, directly or transitively, nearest first.
+        """
+        return self.walk(node_hash, self.parent_edges)
+
+    def descendants(self, node_hash):
+        """
+        Returns every node that depends on the given node, directly or transitively, nearest first.
+        """
+        return self.walk(node_hash, self.edges)
+
+    def validate_dag(self, incremental=False):
+        """
+        Validates the DAG to ensure there are no cycles, auditing every edge.
+        :param incremental: Only check that the nodes added since the last incremental validation
+            come after their parents in the topological order; trusts the earlier nodes and the edges.
+        """
+        if not incremental:
+            return self.find_cycle() is None
+
+        # Every parent must come before its child in the topological order
+        for node in self.nodes[self.validated:]:
+            position = self.order[node.hash]
+            for parent_hash in node.parent_hashes:
+                if self.order.get(parent_hash, position) >= position:
                     return False
-            stack.remove(node_hash)
-            return True
+            self.validated += 1
+        return True
 
+    def find_cycle(self):
+        """
+        Searches every edge for a cycle with an iterative depth-first search.
+        Returns the hashes of a cycle (the first hash repeated at the end), or None.
+        """
+        done = set()
         for node in self.nodes:
-            if not visit(node.hash):
-                return False
-        return True
+            if node.hash in done:
+                continue
+            # The current path, and an iterator over the unvisited children of each node on it
+            path = [node.hash]
+            on_path = {node.hash: 0}
+            children = [iter(self.edges.get(node.hash, ()))]
+            while children:
+                child_hash = next(children[-1], None)
+                if child_hash is None:
+                    finished = path.pop()
+                    del on_path[finished]
+                    done.add(finished)
+                    children.pop()
+                elif child_hash in on_path:
+                    return path[on_path[child_hash]:] + [child_hash]
+                elif child_hash not in done:
+                    on_path[child_hash] = len(path)
+                    path.append(child_hash)
+                    children.append(iter(self.edges.get(child_hash, ())))
+        return None
 
     def __repr__(self):
         return f"DAGBlockchain(nodes={self.nodes})"
@@ -169,8 +260,14 @@ if __name__ == "__main__":
     algo5 = Aladapter("CombinedAladapter", "1.0", "5 years", "2030-01-01", "policy_combined.json", "Regulation C")
     node5 = dag_blockchain.add_node(algo5, [node3.hash, node4.hash])
 
+    # Query the dependency indexes
+    print(f"Ancestors of CombinedAladapter: {[node.aladapter.identity_name for node in dag_blockchain.ancestors(node5.hash)]}")
+    print(f"Descendants of Aladapter1 1.0: {[node.aladapter.identity_name for node in dag_blockchain.descendants(node1.hash)]}")
+    print(f"Versions of Aladapter1: {[node.aladapter.version for node in dag_blockchain.get_nodes_by_identity('Aladapter1')]}")
+
     # Validate the DAG
     print(f"Is DAG valid? {dag_blockchain.validate_dag()}")
+    print(f"Full audit, cycle found: {dag_blockchain.find_cycle()}")
 
     # Display the DAG blockchain
     print("DAG Blockchain:")
@@ -0,0 +1,164 @@
+## Reachability index for the adapter DAG of AIverManager.py.
+#
+## How it works:
+#	1.	DAGBlockchain keeps its nodes in a topological order (DAGBlockchain.order), so every
+#	    	    node's ancestors come before it.
+#	2.	Only checkpoint nodes keep a bitset (a Python int) of all their ancestors' positions.
+#	    	    Every other node keeps the few checkpoints it reaches without passing through another
+#	    	    checkpoint, and a bitset of the non-checkpoint ancestors on those paths, stored from the
+#	    	    lowest of them up. Every ancestor is in that window, or is one of those checkpoints, or
+#	    	    one of their ancestors.
+#	3.	A node becomes a checkpoint when its window would span more than checkpoint_span positions
+#	    	    or it would reach more than max_frontier checkpoints. One long version line then holds a
+#	    	    full bitset every checkpoint_span nodes instead of at every node, which divides the
+#	    	    quadratic cost of per-node bitsets by checkpoint_span.
+#	4.	"Does A depend on B?" is a bit test in A's window plus one per checkpoint it reaches.
+#	    	    "Which deployed adapters are affected if V is revoked?" is one such test per adapter.
+#	5.	memory_usage() reports the bytes held by the bitsets and windows.
+#
+## How to Use:
+#	reachability = ReachabilityIndex(dag_blockchain)
+#	reachability.depends_on(node5.hash, node1.hash)
+#	reachability.affected_by(node1.hash, deployed_hashes)
+
+import sys
+
+
+class ReachabilityIndex:
+    def __init__(self, dag, checkpoint_span=256, max_frontier=8):
+        """
+        Creates a reachability index that follows a DAGBlockchain as nodes are appended.
+        :param dag: DAGBlockchain to index.
+        :param checkpoint_span: Widest window, in positions, a node keeps before it becomes a checkpoint.
+        :param max_frontier: Most checkpoints a node refers to before it becomes a checkpoint.
+        """
+        self.dag = dag
+        self.checkpoint_span = checkpoint_span
+        self.max_frontier = max_frontier
+        # position -> bitset of all ancestors for a checkpoint, otherwise
+        # (base, bitset of window ancestors shifted down by base, checkpoints reached)
+        self.entries = []
+        self.catch_up()
+
+    def catch_up(self):
+        """
+        Indexes the nodes appended to the DAG since the last call.
+        """
+        nodes = self.dag.nodes
+        order = self.dag.order
+        for position in range(len(self.entries), len(nodes)):
+            parents = [order[parent_hash] for parent_hash in nodes[position].parent_hashes]
+            window = 0
+            frontier = set()
+            for parent in parents:
+                entry = self.entries[parent]
+                if isinstance(entry, int):
+                    frontier.add(parent)
+                else:
+                    base, bits, checkpoints = entry
+                    window |= bits << base | 1 << parent
+                    frontier.update(checkpoints)
+
+            base = (window & -window).bit_length() - 1 if window else position
+            if position - base <= self.checkpoint_span and len(frontier) <= self.max_frontier:
+                self.entries.append((base, window >> base, tuple(sorted(frontier))))
+                continue
+            ancestors = window
+            for checkpoint in frontier:
+                ancestors |= self.entries[checkpoint] | 1 << checkpoint
+            self.entries.append(ancestors)
+
+    def position(self, node_hash):
+        position = self.dag.order.get(node_hash)
+        if position is None:
+            raise ValueError(f"Node {node_hash} does not exist in the DAG.")
+        if position >= len(self.entries):
+            self.catch_up()
+        return position
+
+    def reaches(self, position, ancestor):
+        """
+        Returns True if the node at `position` depends on the node at `ancestor`.
+        """
+        if ancestor >= position:
+            return False
+        entry = self.entries[position]
+        if isinstance(entry, int):
+            return bool(entry >> ancestor & 1)
+        base, bits, checkpoints = entry
+        if ancestor >= base and bits >> (ancestor - base) & 1:
+            return True
+        return any(checkpoint == ancestor or self.entries[checkpoint] >> ancestor & 1
+                   for checkpoint in checkpoints if checkpoint >= ancestor)
+
+    def depends_on(self, node_hash, ancestor_hash):
+        """
+        Returns True if node_hash depends on ancestor_hash, directly or transitively.
+        """
+        return self.reaches(self.position(node_hash), self.position(ancestor_hash))
+
+    def affected_by(self, revoked_hash, deployed_hashes=None):
+        """
+        Returns the nodes that depend on a revoked node.
+        :param revoked_hash: Hash of the revoked node.
+        :param deployed_hashes: Only consider these nodes; defaults to every node in the DAG.
+        """
+        self.catch_up()
+        revoked = self.position(revoked_hash)
+        if deployed_hashes is None:
+            # Only nodes after the revoked one in topological order can depend on it
+            nodes = self.dag.nodes
+            return [nodes[position] for position in range(revoked + 1, len(self.entries))
+                    if self.reaches(position, revoked)]
+        return [self.dag.node_index[node_hash] for node_hash in deployed_hashes
+                if self.reaches(self.position(node_hash), revoked)]
+
+    def checkpoints(self):
+        return sum(isinstance(entry, int) for entry in self.entries)
+
+    def memory_usage(self):
+        """
+        Returns the bytes held by the index: the checkpoint bitsets, the windows and the list holding them.
+        """
+        size = sys.getsizeof(self.entries)
+        for entry in self.entries:
+            size += sys.getsizeof(entry)
+            if not isinstance(entry, int):
+                size += sys.getsizeof(entry[1]) + sys.getsizeof(entry[2])
+        return size
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return (f"ReachabilityIndex(nodes={len(self)}, checkpoints={self.checkpoints()}, "
+                f"bytes={self.memory_usage()})")
+
+
+# Example usage
+if __name__ == "__main__":
+    import random
+    import time
+    from AIverManager import Aladapter, DAGBlockchain
+
+    dag_blockchain = DAGBlockchain()
+    reachability = ReachabilityIndex(dag_blockchain)
+    rng = random.Random(0)
+    hashes = []
+    for i in range(20000):
+        # Each version depends on one or two recent versions
+        parents = rng.sample(hashes[-20:], min(len(hashes), rng.randint(1, 2)))
+        node = dag_blockchain.add_node(Aladapter(f"Aladapter{i % 50}", f"{i // 50}.0", "2 years", "2030-01-01",
+                                                 "policy_v1.json", "Regulation A"), parents)
+        hashes.append(node.hash)
+    reachability.catch_up()
+    print(reachability)
+
+    queries = [(rng.choice(hashes), rng.choice(hashes)) for _ in range(50000)]
+    start = time.perf_counter()
+    dependent = sum(reachability.depends_on(node_hash, ancestor_hash) for node_hash, ancestor_hash in queries)
+    elapsed = time.perf_counter() - start
+    print(f"{len(queries)} dependency queries in {elapsed:.3f}s, {dependent} dependent")
+
+    deployed = rng.sample(hashes, 1000)
+    print(f"Deployed adapters affected by revoking {hashes[100][:12]}: {len(reachability.affected_by(hashes[100], deployed))}")
@@ -18,9 +18,20 @@
 #		- Mining and Validation:
 #		- Proof-of-work ensures immutability.
 #		- Validates the chain by verifying hashes.
+#		- Blockchain(index=VersionRegistry()) keeps a registry of parsed versions per identity
+#		  up to date as blocks are mined (see registry.py).
+#		- is_chain_valid() re-checks every block; validate() opts in to only re-checking blocks above
+#		  a validated watermark, and validate(full=True, workers=N)
+#		  audits the whole chain across processes and reports the first failing height.
 #	3.	Customizable:
 #		- The difficulty level can be adjusted.
+#		- Mining can be split across processes with Blockchain(workers=N).
+#		- Blockchain(sealer=AuthoritySealer(keyring, signer)) seals blocks with an HMAC instead of
+#		  proof-of-work, for permissioned deployments. A chain accepts blocks sealed one way only: an
+#		  authority chain rejects proof-of-work blocks, however hard they were mined, and vice versa.
 #		- Add policies and regulations as per need.
+#	4.	Shared engine: mining, sealing and validation come from LedgerEngine/ledger_engine.py,
+#		shared with the other single-chain ledgers.
 #
 ## Running the Code
 #	1.	Save the code into a Python file, e.g., algorithm_blockchain.py.
@@ -29,8 +40,15 @@
 
 
 import hashlib
+import os
+import sys
 import time
 
+# Mining, sealing and validation are shared with the other ledgers (see LedgerEngine/ledger_engine.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "LedgerEngine"))
+from ledger_engine import (AUTHORITY, PROOF_OF_WORK, AuthoritySealer, ProofOfWork,  # noqa: E402,F401
+                           SealedBlock, SealedChain, ValidatedChain, ValidationReport)
+
 class Algorithm:
     def __init__(self, identity_name, version, lifetime, expiration_date, policy_file, regulations):
         self.identity_name = identity_name
@@ -46,37 +64,47 @@ class Algorithm:
                 f"policy_file={self.policy_file}, regulations={self.regulations})")
 
 
-class Block:
+class Block(SealedBlock):
     def __init__(self, previous_hash, algorithms, timestamp=None):
         self.previous_hash = previous_hash
         self.algorithms = algorithms  # List of algorithms in the block
         self.timestamp = timestamp or time.time()
         self.nonce = 0
         self.hash = self.calculate_hash()
+        self.signer = None  # Key id of the authority that sealed the block; None for proof-of-work
+        self.seal = None
 
-    def calculate_hash(self):
-        block_content = (
+    # Everything that is hashed except the nonce
+    def hash_prefix(self):
+        return (
             str(self.previous_hash) +
             str(self.timestamp) +
-            str([str(alg) for alg in self.algorithms]) +
-            str(self.nonce)
+            str([str(alg) for alg in self.algorithms])
         )
-        return hashlib.sha256(block_content.encode()).hexdigest()
 
-    def mine_block(self, difficulty):
-        target = '0' * difficulty
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+    def calculate_hash(self):
+        block_content = self.hash_prefix() + str(self.nonce)
+        return hashlib.sha256(block_content.encode()).hexdigest()
 
     def __repr__(self):
         return f"Block(hash={self.hash}, algorithms={self.algorithms})"
 
 
-class Blockchain:
-    def __init__(self, difficulty=2):
+class Blockchain(SealedChain, ValidatedChain):
+    def __init__(self, difficulty=2, workers=1, watermark_path=None, index=None, sealer=None, keyring=None,
+                 sealing=None):
         self.chain = [self.create_genesis_block()]
-        self.difficulty = difficulty
+        # Blocks are validated at the difficulty they are mined at, so a ProofOfWork sealer's overrides it.
+        # How new blocks are sealed (None: proof-of-work at `difficulty`), the keys authority-sealed
+        # blocks are validated with, and how every block must be sealed (see LedgerEngine/ledger_engine.py)
+        self.configure_sealing(difficulty, workers, sealer, keyring, sealing)
+        # (height, hash) of the last block known to be valid, persisted to watermark_path if given
+        self.watermark_path = watermark_path
+        self.watermark = self.load_watermark()
+        # Index kept in step with the chain, e.g. a VersionRegistry (see registry.py)
+        self.index = index
+        if index is not None:
+            index.catch_up(self.chain)
         self.pending_algorithms = []
 
     def create_genesis_block(self):
@@ -92,22 +120,15 @@ class Blockchain:
 
     def mine_pending_algorithms(self):
         new_block = Block(self.get_latest_block().hash, self.pending_algorithms)
-        new_block.mine_block(self.difficulty)
+        self.seal_block(new_block)
 
-        self.chain.append(new_block)
+        self.append_block(new_block)
         self.pending_algorithms = []
 
-    def is_chain_valid(self):
-        for i in range(1, len(self.chain)):
-            current = self.chain[i]
-            previous = self.chain[i - 1]
-
-            if current.hash != current.calculate_hash():
-                return False
-            if current.previous_hash != previous.hash:
-                return False
-
-        return True
+    def append_block(self, block):
+        self.chain.append(block)
+        if self.index is not None:
+            self.index.add_block(len(self.chain) - 1, block)
 
     def __repr__(self):
         return f"Blockchain(chain={self.chain})"
@@ -157,3 +178,17 @@ if __name__ == "__main__":
     print("Blockchain:")
     for block in algo_blockchain.chain:
         print(block)
+
+    # A permissioned ledger seals blocks with an HMAC instead of proof-of-work
+    keyring = {"authority-1": b"shared secret of authority 1"}
+    authority_blockchain = Blockchain(sealer=AuthoritySealer(keyring, "authority-1"))
+    authority_blockchain.add_algorithm(Algorithm(
+        identity_name="Algorithm1",
+        version="1.1",
+        lifetime="2 years",
+        expiration_date="2027-01-01",
+        policy_file="policy_v1.json",
+        regulations="Regulation A"
+    ))
+    authority_blockchain.mine_pending_algorithms()
+    print(f"Is authority-sealed Blockchain Valid? {authority_blockchain.is_chain_valid()}")
@@ -0,0 +1,137 @@
+## Version registry for the algorithms recorded by AIverManager.py.
+#
+## Indexes, per identity name:
+#	1.	Versions: the parsed versions ("10.0" > "2.1", "2.0-beta" < "2.0") in sorted order,
+#	    	    each with the block height and Algorithm that registered it.
+#	2.	History: the registrations in chain order.
+#
+## Queries (each a bisect into one identity's lists):
+#	lookup(identity, version)	-> (height, Algorithm) that registered the version
+#	latest(identity)			-> newest version
+#	versions(identity, low, high)	-> versions in [low, high)
+#	history(identity, since, until)	-> registrations in blocks [since, until)
+#
+## How to Use:
+#	registry = VersionRegistry()
+#	algo_blockchain = Blockchain(difficulty=3, index=registry)
+#	...
+#	height, algorithm = registry.latest("Algorithm1")
+
+import bisect
+import importlib.util
+import os
+
+
+def load_script(name, path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(os.path.dirname(os.path.abspath(__file__)), path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Versions sort the same way as in the resolver ("1.10" > "1.9", "2.0-beta" < "2.0"), which owns parse_version
+parse_version = load_script("resolver", os.path.join(os.pardir, "resolver.py")).parse_version
+
+
+class IdentityVersions:
+    __slots__ = ("keys", "entries", "heights", "registrations")
+
+    def __init__(self):
+        self.keys = []  # sorted (version key, registration number)
+        self.entries = []  # (height, Algorithm), parallel to keys
+        self.heights = []  # block height of each registration, in chain order
+        self.registrations = []  # (height, Algorithm), in chain order
+
+    def add(self, height, algorithm):
+        key = (parse_version(algorithm.version), len(self.registrations))
+        position = bisect.bisect(self.keys, key)
+        self.keys.insert(position, key)
+        self.entries.insert(position, (height, algorithm))
+        self.heights.append(height)
+        self.registrations.append((height, algorithm))
+
+
+class VersionRegistry:
+    def __init__(self):
+        self.identities = {}  # identity name -> IdentityVersions
+        self.block_hashes = []  # height -> block hash, to detect a replaced chain
+
+    # Indexes the algorithms of a block appended at the given height
+    def add_block(self, height, block):
+        if height != len(self.block_hashes):
+            raise ValueError(f"Expected block at height {len(self.block_hashes)}, got {height}")
+        self.block_hashes.append(block.hash)
+        for algorithm in block.algorithms:
+            self.identities.setdefault(algorithm.identity_name, IdentityVersions()).add(height, algorithm)
+
+    # Indexes the blocks above the last indexed height; rebuilds if the indexed blocks were replaced
+    def catch_up(self, chain):
+        indexed = len(self.block_hashes)
+        if indexed and (indexed > len(chain) or chain[indexed - 1].hash != self.block_hashes[-1]):
+            self.__init__()
+        for height in range(len(self.block_hashes), len(chain)):
+            self.add_block(height, chain[height])
+
+    def rebuild(self, chain):
+        self.__init__()
+        self.catch_up(chain)
+
+    # (height, Algorithm) of the latest registration of exactly this version, or None
+    def lookup(self, identity_name, version):
+        versions = self.identities.get(identity_name)
+        if versions is None:
+            return None
+        key = parse_version(version)
+        position = bisect.bisect_left(versions.keys, (key, len(versions.registrations)))
+        if position and versions.keys[position - 1][0] == key:
+            return versions.entries[position - 1]
+        return None
+
+    # (height, Algorithm) of the newest version of an identity, or None
+    def latest(self, identity_name):
+        versions = self.identities.get(identity_name)
+        if versions is None:
+            return None
+        return versions.entries[-1]
+
+    # (height, Algorithm) of the versions in [low, high), oldest version first; None leaves a bound open
+    def versions(self, identity_name, low=None, high=None):
+        versions = self.identities.get(identity_name)
+        if versions is None:
+            return []
+        start = 0 if low is None else bisect.bisect_left(versions.keys, (parse_version(low), -1))
+        stop = len(versions.keys) if high is None else bisect.bisect_left(versions.keys, (parse_version(high), -1))
+        return versions.entries[start:max(start, stop)]
+
+    # (height, Algorithm) registered in blocks [since, until), in chain order
+    def history(self, identity_name, since=0, until=None):
+        versions = self.identities.get(identity_name)
+        if versions is None:
+            return []
+        start = bisect.bisect_left(versions.heights, since)
+        stop = len(versions.heights) if until is None else bisect.bisect_left(versions.heights, until)
+        return versions.registrations[start:max(start, stop)]
+
+    def __len__(self):
+        return sum(len(versions.registrations) for versions in self.identities.values())
+
+    def __repr__(self):
+        return f"VersionRegistry(identities={len(self.identities)}, registrations={len(self)})"
+
+
+# Example usage
+if __name__ == "__main__":
+    from AIverManager import Algorithm, Blockchain
+
+    registry = VersionRegistry()
+    algo_blockchain = Blockchain(difficulty=2, index=registry)
+    for version in ("1.0", "2.1", "10.0", "2.0-beta", "9.3"):
+        algo_blockchain.add_algorithm(Algorithm("Algorithm1", version, "2 years", "2030-01-01",
+                                                "policy_v1.json", "Regulation A"))
+        algo_blockchain.mine_pending_algorithms()
+
+    print(registry)
+    print(f"Latest: {registry.latest('Algorithm1')}")
+    print(f"2.1 registered at height {registry.lookup('Algorithm1', '2.1')[0]}")
+    print(f"Versions in [2.0, 10.0): {[algorithm.version for _, algorithm in registry.versions('Algorithm1', '2.0', '10.0')]}")
+    print(f"History: {[(height, algorithm.version) for height, algorithm in registry.history('Algorithm1')]}")
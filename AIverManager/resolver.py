@@ -0,0 +1,273 @@
+## Active-version resolution for the AIverManager ledgers.
+#
+## Answers "what is the newest version of identity X that has not expired as of date D"
+# for both the DAG-based manager (DAG-BasedBlockchain/AIverManager.py) and the
+# single-chain manager (SingleChainBlockchain/AIverManager.py).
+#
+## How it works:
+#	1.	Versions ("1.0", "v2.10", "2.0-beta") are parsed into sortable keys, and expiration
+#	    	    dates (ISO dates or datetimes, timestamps, or None/"" for never) into timestamps.
+#	2.	Each identity keeps its versions sorted by expiry, with a suffix maximum of the
+#	    	    version keys, so resolve(identity, as_of) is one bisect plus one lookup.
+#	3.	An expiry heap lets sweep() drop expired versions incrementally; the per-identity
+#	    	    lists lose only a prefix, so their suffix maxima stay valid.
+#	4.	A small LRU keeps the last answer of hot identities together with the time range
+#	    	    it holds for, so repeated lookups for "now" skip even the bisect.
+#	5.	New DAG nodes and blocks are picked up on every resolve().
+#
+## How to Use:
+#	resolver = VersionResolver(dag=dag_blockchain)  # or chain=algo_blockchain, or both
+#	node = resolver.resolve("Aladapter1", as_of="2027-06-01")
+
+import bisect
+import collections
+import datetime
+import heapq
+import itertools
+import math
+import re
+import time
+
+NEVER = math.inf
+
+VERSION = re.compile(r"v?(\d+(?:\.\d+)*)(.*)", re.IGNORECASE)
+NEVER_EXPIRES = {"", "never", "none", "n/a"}
+
+
+def parse_version(version):
+    """
+    Returns a sortable key for a version string: numeric release parts compare as numbers
+    ("1.10" > "1.9", "1.0" == "1"), and a pre-release suffix sorts before the release ("2.0-beta" < "2.0").
+    """
+    match = VERSION.fullmatch(str(version).strip())
+    if match is None:
+        return (), 0, str(version)
+    release = [int(part) for part in match.group(1).split(".")]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+    suffix = match.group(2).lstrip(".-+_")
+    return tuple(release), 0 if suffix else 1, suffix
+
+
+def parse_time(value):
+    """
+    Converts a date, datetime, timestamp or ISO 8601 string to a POSIX timestamp.
+    Naive dates and datetimes are taken as UTC.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.strip())
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.timestamp()
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day, tzinfo=datetime.timezone.utc).timestamp()
+    raise ValueError(f"Cannot interpret {value!r} as a point in time")
+
+
+def parse_expiration(expiration_date):
+    """
+    Like parse_time, but None and "never" mean the version does not expire.
+    """
+    if expiration_date is None or str(expiration_date).strip().lower() in NEVER_EXPIRES:
+        return NEVER
+    return parse_time(expiration_date)
+
+
+class VersionSet:
+    __slots__ = ("expiries", "entries", "best")
+
+    def __init__(self):
+        """
+        The versions of one identity, sorted by expiry.
+        """
+        self.expiries = []  # sorted expiry timestamps
+        self.entries = []  # (version key, sequence, ref), parallel to expiries
+        self.best = []  # best[i]: index of the newest version among entries[i:]
+
+    def add(self, expiry, version_key, sequence, ref):
+        position = bisect.bisect_right(self.expiries, expiry)
+        self.expiries.insert(position, expiry)
+        self.entries.insert(position, (version_key, sequence, ref))
+        self.best.insert(position, position)
+        # Entries after the new one only moved up by one place
+        for i in range(position + 1, len(self.best)):
+            self.best[i] += 1
+        # Sequences are unique, so comparing entries never reaches the refs
+        for i in range(position, -1, -1):
+            newer = self.best[i + 1] if i + 1 < len(self.best) else i
+            self.best[i] = newer if self.entries[newer][:2] > self.entries[i][:2] else i
+
+    def newest(self, as_of):
+        """
+        Returns (ref, valid_from, valid_until) for the newest version with expiry > as_of;
+        the same answer holds for every time in [valid_from, valid_until). ref is None
+        if every version has expired.
+        """
+        position = bisect.bisect_right(self.expiries, as_of)
+        valid_from = self.expiries[position - 1] if position else -NEVER
+        if position == len(self.entries):
+            return None, valid_from, NEVER
+        newest = self.best[position]
+        return self.entries[newest][2], valid_from, self.expiries[newest]
+
+    def drop_expired(self, until):
+        """
+        Drops the versions with expiry <= until. Returns how many were dropped.
+        """
+        position = bisect.bisect_right(self.expiries, until)
+        if position:
+            del self.expiries[:position]
+            del self.entries[:position]
+            self.best = [index - position for index in self.best[position:]]
+        return position
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class VersionResolver:
+    def __init__(self, dag=None, chain=None, cache_size=128):
+        """
+        Creates a resolver over the versions recorded in one or both AIverManager ledgers.
+        :param dag: DAGBlockchain; resolve() returns its DAGNodes.
+        :param chain: single-chain Blockchain; resolve() returns its Algorithms.
+        :param cache_size: Number of identities whose last answer is cached.
+        """
+        self.dag = dag
+        self.chain = chain
+        self.cache_size = cache_size
+        self.identities = {}  # identity name -> VersionSet
+        self.expiry_heap = []  # (expiry, sequence, identity name)
+        self.sequence = itertools.count()
+        self.cache = collections.OrderedDict()  # identity name -> (valid_from, valid_until, ref)
+        self.swept_until = -NEVER
+        self.unparsed = []  # refs whose version or expiration date could not be interpreted
+        self.dag_indexed = 0
+        self.chain_indexed = 0
+        self.chain_tip = None
+
+    def add(self, record, ref=None):
+        """
+        Indexes one version.
+        :param record: Aladapter or Algorithm (anything with identity_name, version and expiration_date).
+        :param ref: What resolve() returns for this version; defaults to the record.
+        """
+        ref = record if ref is None else ref
+        try:
+            expiry = parse_expiration(record.expiration_date)
+        except ValueError:
+            self.unparsed.append(ref)
+            return
+        if expiry <= self.swept_until:
+            return
+        sequence = next(self.sequence)
+        identity = record.identity_name
+        self.identities.setdefault(identity, VersionSet()).add(expiry, parse_version(record.version), sequence, ref)
+        if expiry != NEVER:
+            heapq.heappush(self.expiry_heap, (expiry, sequence, identity))
+        self.cache.pop(identity, None)
+
+    def refresh(self):
+        """
+        Indexes the DAG nodes and blocks added since the last call. If the chain's indexed
+        blocks were replaced, everything is indexed again.
+        """
+        if self.chain is not None and self.chain_tip is not None:
+            height, block_hash = self.chain_tip
+            if height >= len(self.chain.chain) or self.chain.chain[height].hash != block_hash:
+                self.__init__(self.dag, self.chain, self.cache_size)
+        if self.dag is not None:
+            nodes = self.dag.nodes
+            for node in nodes[self.dag_indexed:]:
+                self.add(node.aladapter, node)
+            self.dag_indexed = len(nodes)
+        if self.chain is not None:
+            blocks = self.chain.chain
+            for height in range(self.chain_indexed, len(blocks)):
+                for algorithm in blocks[height].algorithms:
+                    self.add(algorithm)
+            self.chain_indexed = len(blocks)
+            self.chain_tip = (len(blocks) - 1, blocks[-1].hash)
+
+    def resolve(self, identity_name, as_of=None):
+        """
+        Returns the newest version of an identity that has not expired at `as_of`, or None.
+        :param identity_name: Identity to resolve.
+        :param as_of: Date, datetime, timestamp or ISO 8601 string; defaults to now.
+        """
+        self.refresh()
+        as_of = time.time() if as_of is None else parse_time(as_of)
+        if as_of < self.swept_until:
+            raise ValueError(f"Versions expired before {self.swept_until} have been swept")
+
+        cached = self.cache.get(identity_name)
+        if cached is not None and cached[0] <= as_of < cached[1]:
+            self.cache.move_to_end(identity_name)
+            return cached[2]
+
+        versions = self.identities.get(identity_name)
+        if versions is None:
+            return None
+        ref, valid_from, valid_until = versions.newest(as_of)
+        self.cache[identity_name] = (valid_from, valid_until, ref)
+        self.cache.move_to_end(identity_name)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return ref
+
+    def sweep(self, until=None):
+        """
+        Drops the versions that expired at or before `until` (default now), visiting only
+        the identities that have such versions. Later resolve() calls must not ask about
+        earlier times. Returns the number of versions dropped.
+        """
+        until = time.time() if until is None else parse_time(until)
+        affected = set()
+        while self.expiry_heap and self.expiry_heap[0][0] <= until:
+            affected.add(heapq.heappop(self.expiry_heap)[2])
+        dropped = 0
+        for identity in affected:
+            versions = self.identities[identity]
+            dropped += versions.drop_expired(until)
+            if not versions:
+                del self.identities[identity]
+            self.cache.pop(identity, None)
+        self.swept_until = max(self.swept_until, until)
+        return dropped
+
+    def __len__(self):
+        return sum(len(versions) for versions in self.identities.values())
+
+    def __repr__(self):
+        return (f"VersionResolver(identities={len(self.identities)}, versions={len(self)}, "
+                f"cached={len(self.cache)}, unparsed={len(self.unparsed)})")
+
+
+# Example usage
+if __name__ == "__main__":
+    import importlib.util
+    import os
+
+    def load_script(name, path):
+        spec = importlib.util.spec_from_file_location(name, os.path.join(os.path.dirname(__file__), path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    dag_manager = load_script("dag_manager", "DAG-BasedBlockchain/AIverManager.py")
+    dag_blockchain = dag_manager.DAGBlockchain()
+    node1 = dag_blockchain.add_node(dag_manager.Aladapter(
+        "Aladapter1", "1.0", "2 years", "2026-01-01", "policy_v1.json", "Regulation A"), [])
+    node2 = dag_blockchain.add_node(dag_manager.Aladapter(
+        "Aladapter1", "2.0", "2 years", "2028-01-01", "policy_v1.json", "Regulation A"), [node1.hash])
+    dag_blockchain.add_node(dag_manager.Aladapter(
+        "Aladapter1", "2.1-beta", "1 year", "2027-01-01", "policy_v1.json", "Regulation A"), [node2.hash])
+
+    resolver = VersionResolver(dag=dag_blockchain)
+    for as_of in ("2025-06-01", "2026-06-01", "2027-06-01", "2028-06-01"):
+        node = resolver.resolve("Aladapter1", as_of)
+        print(f"Aladapter1 as of {as_of}: {node.aladapter.version if node else None}")
+    print(f"Swept {resolver.sweep('2026-12-31')} expired versions: {resolver}")
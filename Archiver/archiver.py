@@ -6,14 +6,28 @@
 #	1.	AI Operation Details:
 #		Algorithm Name: Name of the AI algorithm used.
 #		Dataset: Dataset associated with the operation.
+#		Dataset Digest / Size: Fingerprint of the dataset's bytes, filled in by fingerprint.py.
 #		Output: Result produced by the algorithm.
 #		Parameters: Parameters used in the algorithm.
 #	2.	Mining and Proof-of-Work:
 #		Ensures immutability of records using a hash-based proof-of-work mechanism.
+#		Blockchain(workers=N) splits the nonce search across N processes.
+#		Blockchain(sealer=AuthoritySealer(keyring, signer)) seals blocks with an HMAC instead,
+#		for permissioned deployments. A chain accepts blocks sealed one way only: an authority chain
+#		rejects proof-of-work blocks, however hard they were mined, and vice versa.
 #	3.	Validation:
-#		Checks the integrity of the blockchain by validating hashes.
-#	4.	Extensibility:
+#		Checks the integrity of the blockchain by validating hashes; is_chain_valid() checks every block.
+#		validate() opts in to only re-checks blocks above a validated watermark (persisted with watermark_path).
+#		validate(full=True, workers=N) shards a full audit across processes.
+#		Both return a report with the first failing height and the reason.
+#	4.	Durability:
+#		Blockchain(log=OperationLog(path)) logs pending operations before add_operation returns
+#		and replays them after a restart (see wal.py).
+#	5.	Extensibility:
 #		Add more metadata fields to the AIOperation class as needed.
+#	6.	Shared engine:
+#		Mining, sealing and validation come from LedgerEngine/ledger_engine.py, shared with the
+#		other single-chain ledgers.
 #
 ## How to Use
 #	1.	Run the Code:
@@ -25,10 +39,19 @@
 #		Use is_chain_valid to check the blockchain’s integrity.
 
 import hashlib
+import os
+import sys
+import threading
 import time
 
+# Mining, sealing and validation are shared with the other ledgers (see LedgerEngine/ledger_engine.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "LedgerEngine"))
+from ledger_engine import (AUTHORITY, PROOF_OF_WORK, AuthoritySealer, ProofOfWork,  # noqa: E402,F401
+                           SealedBlock, SealedChain, ValidatedChain, ValidationReport)
+
 class AIOperation:
-    def __init__(self, algorithm_name, dataset, output, parameters, timestamp=None):
+    def __init__(self, algorithm_name, dataset, output, parameters, timestamp=None,
+                 dataset_digest=None, dataset_size=None):
         """
         Records an AI operation.
         :param algorithm_name: Name of the AI algorithm.
@@ -36,19 +59,28 @@ class AIOperation:
         :param output: Output produced by the algorithm.
         :param parameters: Parameters used in the algorithm.
         :param timestamp: Timestamp of the operation.
+        :param dataset_digest: Fingerprint of the dataset's bytes (see fingerprint.py).
+        :param dataset_size: Size of the dataset in bytes.
         """
         self.algorithm_name = algorithm_name
         self.dataset = dataset
         self.output = output
         self.parameters = parameters
         self.timestamp = timestamp or time.time()
+        self.dataset_digest = dataset_digest
+        self.dataset_size = dataset_size
 
     def __repr__(self):
+        fingerprint = ""
+        # Only fingerprinted operations mention it, so earlier records keep their hashes
+        if self.dataset_digest is not None:
+            fingerprint = f", dataset_digest={self.dataset_digest}, dataset_size={self.dataset_size}"
         return (f"AIOperation(algorithm_name={self.algorithm_name}, dataset={self.dataset}, "
-                f"output={self.output}, parameters={self.parameters}, timestamp={self.timestamp})")
+                f"output={self.output}, parameters={self.parameters}, timestamp={self.timestamp}"
+                f"{fingerprint})")
 
 
-class Block:
+class Block(SealedBlock):
     def __init__(self, previous_hash, operations, timestamp=None):
         """
         Represents a block in the blockchain.
@@ -61,38 +93,52 @@ class Block:
         self.timestamp = timestamp or time.time()
         self.nonce = 0
         self.hash = self.calculate_hash()
+        self.signer = None  # Key id of the authority that sealed the block; None for proof-of-work
+        self.seal = None
 
-    def calculate_hash(self):
-        block_content = (
+    def hash_prefix(self):
+        """
+        Returns the part of the hashed content that does not depend on the nonce.
+        """
+        return (
             str(self.previous_hash) +
             str(self.timestamp) +
-            str([str(op) for op in self.operations]) +
-            str(self.nonce)
+            str([str(op) for op in self.operations])
         )
-        return hashlib.sha256(block_content.encode()).hexdigest()
 
-    def mine_block(self, difficulty):
-        """
-        Mines the block by finding a hash with a specific number of leading zeros.
-        """
-        target = '0' * difficulty
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+    def calculate_hash(self):
+        block_content = self.hash_prefix() + str(self.nonce)
+        return hashlib.sha256(block_content.encode()).hexdigest()
 
     def __repr__(self):
         return f"Block(hash={self.hash}, operations={self.operations})"
 
 
-class Blockchain:
-    def __init__(self, difficulty=2):
+class Blockchain(SealedChain, ValidatedChain):
+    def __init__(self, difficulty=2, workers=1, watermark_path=None, index=None, log=None,
+                 sealer=None, keyring=None, sealing=None):
         """
         Initializes the blockchain.
-        :param difficulty: Mining difficulty for proof-of-work.
+        :param difficulty: Mining difficulty for proof-of-work; a ProofOfWork sealer's own difficulty overrides it.
+        :param workers: Number of processes used to mine each block.
+        :param watermark_path: File that persists the height validated so far.
+        :param index: Index kept up to date as blocks are mined, e.g. a LineageIndex (see lineage.py).
+        :param log: Write-ahead log of pending operations, replayed here (see wal.py).
+        :param sealer: How new blocks are sealed, e.g. AuthoritySealer; defaults to proof-of-work.
+        :param keyring: Keys for validating authority-sealed blocks; defaults to the sealer's keyring.
+        :param sealing: How every block must be sealed, PROOF_OF_WORK or AUTHORITY; defaults to the
+            sealer's, or to AUTHORITY when a keyring is given.
         """
         self.chain = [self.create_genesis_block()]
-        self.difficulty = difficulty
-        self.pending_operations = []
+        self.configure_sealing(difficulty, workers, sealer, keyring, sealing)
+        self.watermark_path = watermark_path
+        self.watermark = self.load_watermark()
+        self.index = index
+        if index is not None:
+            index.catch_up(self.chain)
+        self.log = log
+        self.lock = threading.Lock()
+        self.pending_operations = log.replay() if log is not None else []
 
     def create_genesis_block(self):
         """
@@ -113,13 +159,28 @@ class Blockchain:
         """
         if not isinstance(operation, AIOperation):
             raise ValueError("Invalid operation format")
-        self.pending_operations.append(operation)
+        # Under the lock, so the operation cannot land in a list a block is being mined from
+        if self.log is None:
+            with self.lock:
+                self.pending_operations.append(operation)
+            return
+        with self.lock:
+            position = self.log.write(operation)
+            self.pending_operations.append(operation)
+        # Wait for the disk outside the lock, so concurrent callers share one fsync
+        self.log.sync(position)
 
     def mine_pending_operations(self, miner_address):
         """
         Mines a block with pending operations and rewards the miner.
         :param miner_address: Address of the miner for reward.
         """
+        # Take the pending operations; operations added while mining go to the next block
+        with self.lock:
+            operations = self.pending_operations
+            self.pending_operations = []
+            log_position = self.log.mark() if self.log is not None else None
+
         # Reward the miner
         reward_operation = AIOperation(
             algorithm_name="Reward",
@@ -127,29 +188,28 @@ class Blockchain:
             output=f"Reward to {miner_address}",
             parameters="",
         )
-        self.pending_operations.append(reward_operation)
 
         # Create a new block
-        new_block = Block(self.get_latest_block().hash, self.pending_operations)
-        new_block.mine_block(self.difficulty)
+        new_block = Block(self.get_latest_block().hash, operations + [reward_operation])
+        try:
+            self.seal_block(new_block)
+        except Exception:
+            # Nothing was sealed, so the operations are pending again, ahead of newer ones
+            with self.lock:
+                self.pending_operations[:0] = operations
+            raise
 
-        self.chain.append(new_block)
-        self.pending_operations = []
+        self.append_block(new_block)
+        if self.log is not None:
+            self.log.truncate(log_position)
 
-    def is_chain_valid(self):
+    def append_block(self, block):
         """
-        Validates the blockchain's integrity.
+        Appends a sealed block and keeps the index in step with the chain.
         """
-        for i in range(1, len(self.chain)):
-            current = self.chain[i]
-            previous = self.chain[i - 1]
-
-            if current.hash != current.calculate_hash():
-                return False
-            if current.previous_hash != previous.hash:
-                return False
-
-        return True
+        self.chain.append(block)
+        if self.index is not None:
+            self.index.add_block(len(self.chain) - 1, block)
 
     def __repr__(self):
         return f"Blockchain(chain={self.chain})"
@@ -193,3 +253,15 @@ if __name__ == "__main__":
     print("Blockchain:")
     for block in ai_blockchain.chain:
         print(block)
+
+    # A permissioned ledger seals blocks with an HMAC instead of proof-of-work
+    keyring = {"authority-1": b"shared secret of authority 1"}
+    authority_blockchain = Blockchain(sealer=AuthoritySealer(keyring, "authority-1"))
+    authority_blockchain.add_operation(AIOperation(
+        algorithm_name="Algorithm1",
+        dataset="Dataset1.csv",
+        output="Classification Result: [A, B, C]",
+        parameters="{'learning_rate': 0.01, 'epochs': 50}"
+    ))
+    authority_blockchain.mine_pending_operations(miner_address="Authority1")
+    print(f"Is authority-sealed Blockchain Valid? {authority_blockchain.is_chain_valid()}")
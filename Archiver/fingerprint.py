@@ -0,0 +1,160 @@
+## Dataset fingerprints for the AI operations recorded by archiver.py.
+#
+## How it works:
+#	1.	A dataset file is hashed in one streaming pass over a memory map.
+#	    	    Files up to segment_size bytes get a plain SHA-256 ("sha256:<hex>").
+#	2.	Larger files are split into segment_size segments hashed on a thread pool
+#	    	    (hashlib releases the GIL), and the segment digests are hashed again
+#	    	    ("sha256-tree-<segment_size>:<hex>").
+#	3.	Results are cached in a SQLite file keyed by (path, size, mtime, inode), so
+#	    	    re-archiving runs over an unchanged dataset does not read it again.
+#	    	    The least recently used entries are evicted beyond max_entries.
+#	4.	annotate() stores the digest and size in an AIOperation, where they become
+#	    	    part of the block hash.
+#
+## How to Use:
+#	fingerprinter = DatasetFingerprinter("fingerprints.sqlite")
+#	operation = fingerprinter.annotate(AIOperation("Algorithm1", "Dataset1.csv", output, parameters))
+#	ai_blockchain.add_operation(operation)
+
+import concurrent.futures
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+
+READ_SIZE = 4 * 1024 * 1024
+
+
+def hash_range(mapped, start, stop):
+    """
+    Returns the SHA-256 digest of mapped[start:stop], fed to hashlib in READ_SIZE pieces.
+    """
+    digest = hashlib.sha256()
+    with memoryview(mapped) as view:
+        for offset in range(start, stop, READ_SIZE):
+            digest.update(view[offset:min(offset + READ_SIZE, stop)])
+    return digest.digest()
+
+
+class DatasetFingerprinter:
+    def __init__(self, cache_path=None, max_entries=10000, segment_size=64 * 1024 * 1024, threads=None):
+        """
+        Creates a fingerprinter.
+        :param cache_path: SQLite file for cached fingerprints (None disables the cache).
+        :param max_entries: Number of cached fingerprints kept.
+        :param segment_size: Files larger than this are hashed in segments of this size.
+        :param threads: Threads hashing the segments of one large file.
+        """
+        self.max_entries = max_entries
+        self.segment_size = segment_size
+        self.threads = threads or os.cpu_count() or 1
+        self.lock = threading.Lock()
+        self.cache = None
+        if cache_path is not None:
+            self.cache = sqlite3.connect(cache_path, check_same_thread=False)
+            self.cache.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                " path TEXT, size INTEGER, mtime_ns INTEGER, inode INTEGER, segment_size INTEGER,"
+                " digest TEXT, last_used REAL,"
+                " PRIMARY KEY (path, size, mtime_ns, inode, segment_size))"
+            )
+            self.cache.execute("CREATE INDEX IF NOT EXISTS fingerprints_last_used ON fingerprints (last_used)")
+            self.cache.commit()
+
+    def hash_file(self, path, size):
+        """
+        Hashes a file without consulting the cache. Returns the digest string.
+        """
+        if size == 0:
+            return "sha256:" + hashlib.sha256().hexdigest()
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if size <= self.segment_size:
+                return "sha256:" + hash_range(mapped, 0, size).hex()
+            bounds = [(start, min(start + self.segment_size, size)) for start in range(0, size, self.segment_size)]
+            with concurrent.futures.ThreadPoolExecutor(min(self.threads, len(bounds))) as pool:
+                segment_digests = list(pool.map(lambda bound: hash_range(mapped, *bound), bounds))
+        root = hashlib.sha256(b"".join(segment_digests)).hexdigest()
+        return f"sha256-tree-{self.segment_size}:{root}"
+
+    def fingerprint(self, path):
+        """
+        Returns (digest, size) of a dataset file, from the cache when the file is unchanged.
+        """
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns, stat.st_ino, self.segment_size)
+        if self.cache is not None:
+            with self.lock:
+                row = self.cache.execute(
+                    "SELECT digest FROM fingerprints"
+                    " WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ? AND segment_size = ?", key
+                ).fetchone()
+                if row is not None:
+                    self.cache.execute(
+                        "UPDATE fingerprints SET last_used = ?"
+                        " WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ? AND segment_size = ?",
+                        (time.time(),) + key)
+                    self.cache.commit()
+                    return row[0], stat.st_size
+
+        digest = self.hash_file(path, stat.st_size)
+
+        if self.cache is not None:
+            with self.lock:
+                # Entries for earlier versions of the same file can never be hit again
+                self.cache.execute("DELETE FROM fingerprints WHERE path = ?", (path,))
+                self.cache.execute("INSERT INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   key + (digest, time.time()))
+                self.cache.execute(
+                    "DELETE FROM fingerprints WHERE rowid IN ("
+                    " SELECT rowid FROM fingerprints ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,))
+                self.cache.commit()
+        return digest, stat.st_size
+
+    def annotate(self, operation, path=None):
+        """
+        Records the fingerprint of the operation's dataset in the operation.
+        :param operation: AIOperation to annotate.
+        :param path: Dataset file; defaults to operation.dataset.
+        :return: The same operation.
+        """
+        operation.dataset_digest, operation.dataset_size = self.fingerprint(path or operation.dataset)
+        return operation
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    from archiver import AIOperation, Blockchain
+
+    directory = tempfile.mkdtemp()
+    dataset_path = os.path.join(directory, "Dataset1.csv")
+    with open(dataset_path, "wb") as f:
+        f.write(os.urandom(3 * 1024 * 1024))
+
+    fingerprinter = DatasetFingerprinter(os.path.join(directory, "fingerprints.sqlite"),
+                                         segment_size=1024 * 1024)
+    ai_blockchain = Blockchain(difficulty=3)
+    ai_blockchain.add_operation(fingerprinter.annotate(AIOperation(
+        algorithm_name="Algorithm1",
+        dataset=dataset_path,
+        output="Classification Result: [A, B, C]",
+        parameters="{'learning_rate': 0.01, 'epochs': 50}"
+    )))
+    ai_blockchain.mine_pending_operations(miner_address="Miner1")
+
+    start = time.perf_counter()
+    fingerprinter.fingerprint(dataset_path)
+    print(f"Cached fingerprint lookup took {time.perf_counter() - start:.6f}s")
+    print(f"Is Blockchain Valid? {ai_blockchain.is_chain_valid()}")
+    print(ai_blockchain.get_latest_block())
+    fingerprinter.close()
@@ -0,0 +1,181 @@
+## Lineage queries over the AI operations archived by archiver.py.
+#
+## Indexes:
+#	1.	Time: every operation, sorted by (timestamp, operation id).
+#	2.	Algorithm and dataset: per algorithm_name / dataset value, that value's
+#	    	    operations sorted by (timestamp, operation id).
+#	Operation ids number operations in chain order, so the sort key is unique.
+#
+## Queries:
+#	1.	query(algorithm=..., dataset=..., since=..., until=...) streams (height, operation)
+#	    	    pairs in timestamp order. Time ranges are found by bisecting the most selective
+#	    	    index; the remaining filters are checked on the candidates.
+#	2.	page(limit, cursor, ...) returns one page of results and the cursor of the next page.
+#
+## How to Use:
+#	lineage = LineageIndex()
+#	ai_blockchain = Blockchain(difficulty=3, index=lineage)
+#	...
+#	runs = list(lineage.query(algorithm="Algorithm1", dataset="Dataset1.csv", since=last_week))
+
+import bisect
+
+
+class LineageIndex:
+    def __init__(self):
+        """
+        Creates an empty lineage index. Pass it to Blockchain(index=...) to keep it up to date.
+        """
+        self.operations = []  # operation id -> (height, AIOperation)
+        self.block_hashes = []  # height -> block hash, to detect a replaced chain
+        self.by_time = []  # sorted (timestamp, operation id)
+        self.by_algorithm = {}  # algorithm_name -> sorted (timestamp, operation id)
+        self.by_dataset = {}  # dataset -> sorted (timestamp, operation id)
+
+    def add_block(self, height, block):
+        """
+        Indexes the operations of a block appended at the given height.
+        """
+        if height != len(self.block_hashes):
+            raise ValueError(f"Expected block at height {len(self.block_hashes)}, got {height}")
+        self.block_hashes.append(block.hash)
+        for operation in block.operations:
+            key = (operation.timestamp, len(self.operations))
+            self.operations.append((height, operation))
+            self.insert(self.by_time, key)
+            self.insert(self.by_algorithm.setdefault(operation.algorithm_name, []), key)
+            self.insert(self.by_dataset.setdefault(operation.dataset, []), key)
+
+    @staticmethod
+    def insert(keys, key):
+        # Operations mostly arrive in time order, so appending is the common case
+        if not keys or keys[-1] <= key:
+            keys.append(key)
+        else:
+            bisect.insort(keys, key)
+
+    def catch_up(self, chain):
+        """
+        Indexes the blocks of `chain` above the last indexed height. If the indexed blocks
+        are no longer the chain's blocks, the index is rebuilt from scratch.
+        """
+        indexed = len(self.block_hashes)
+        if indexed and (indexed > len(chain) or chain[indexed - 1].hash != self.block_hashes[-1]):
+            self.__init__()
+        for height in range(len(self.block_hashes), len(chain)):
+            self.add_block(height, chain[height])
+
+    def rebuild(self, chain):
+        self.__init__()
+        self.catch_up(chain)
+
+    def candidates(self, algorithm, dataset):
+        """
+        Returns the index lists that each contain every match of the given filters.
+        """
+        lists = []
+        if algorithm is not None:
+            lists.append(self.by_algorithm.get(algorithm, []))
+        if dataset is not None:
+            lists.append(self.by_dataset.get(dataset, []))
+        return lists or [self.by_time]
+
+    @staticmethod
+    def bounds(keys, since, until, after):
+        start = 0 if since is None else bisect.bisect_left(keys, (since, -1))
+        if after is not None:
+            start = max(start, bisect.bisect_right(keys, after))
+        stop = len(keys) if until is None else bisect.bisect_left(keys, (until, -1))
+        return start, max(start, stop)
+
+    def query(self, algorithm=None, dataset=None, since=None, until=None, after=None):
+        """
+        Streams matching operations as (height, AIOperation), oldest first.
+        :param algorithm: Only operations of this algorithm_name.
+        :param dataset: Only operations on this dataset.
+        :param since: Only operations with timestamp >= since.
+        :param until: Only operations with timestamp < until.
+        :param after: Resume after this cursor (see page).
+        """
+        for _, height, operation in self.scan(algorithm, dataset, since, until, after):
+            yield height, operation
+
+    def scan(self, algorithm, dataset, since, until, after):
+        """
+        Like query(), but yields (key, height, AIOperation) so callers can resume after a key.
+        """
+        # Walk the index with the fewest entries in the requested time range
+        best = None
+        for keys in self.candidates(algorithm, dataset):
+            start, stop = self.bounds(keys, since, until, after)
+            if best is None or stop - start < best[2] - best[1]:
+                best = (keys, start, stop)
+        keys, start, stop = best
+
+        for position in range(start, stop):
+            key = keys[position]
+            height, operation = self.operations[key[1]]
+            if algorithm is not None and operation.algorithm_name != algorithm:
+                continue
+            if dataset is not None and operation.dataset != dataset:
+                continue
+            yield key, height, operation
+
+    def page(self, limit, cursor=None, **filters):
+        """
+        Returns up to `limit` matches after `cursor` and the cursor for the next page,
+        which is None once the results are exhausted.
+        :param limit: Page size.
+        :param cursor: Cursor returned by the previous page, or None for the first page.
+        :param filters: algorithm, dataset, since and until, as for query().
+        """
+        results = []
+        last_key = None
+        for key, height, operation in self.scan(filters.get("algorithm"), filters.get("dataset"),
+                                                filters.get("since"), filters.get("until"), cursor):
+            if len(results) == limit:
+                return results, last_key
+            results.append((height, operation))
+            last_key = key
+        return results, None
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __repr__(self):
+        return (f"LineageIndex(operations={len(self.operations)}, algorithms={len(self.by_algorithm)}, "
+                f"datasets={len(self.by_dataset)})")
+
+
+# Example usage
+if __name__ == "__main__":
+    from archiver import AIOperation, Blockchain
+
+    lineage = LineageIndex()
+    ai_blockchain = Blockchain(difficulty=2, index=lineage)
+    now = 1700000000.0
+    for day in range(14):
+        for run in range(3):
+            ai_blockchain.add_operation(AIOperation(
+                algorithm_name=f"Algorithm{run}",
+                dataset=f"Dataset{day % 2}.csv",
+                output=f"Run {day}-{run}",
+                parameters="{'epochs': 10}",
+                timestamp=now + day * 86400 + run
+            ))
+        ai_blockchain.mine_pending_operations(miner_address="Miner1")
+
+    last_week = now + 7 * 86400
+    print(lineage)
+    print("Algorithm1 on Dataset1.csv in the last week:")
+    for height, operation in lineage.query(algorithm="Algorithm1", dataset="Dataset1.csv", since=last_week):
+        print(f"  block {height}: {operation.output}")
+
+    cursor = None
+    page_number = 1
+    while True:
+        results, cursor = lineage.page(4, cursor, algorithm="Algorithm0")
+        print(f"Page {page_number}: {[operation.output for _, operation in results]}")
+        if cursor is None:
+            break
+        page_number += 1
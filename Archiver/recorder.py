@@ -0,0 +1,262 @@
+## Non-blocking archiving of training runs into the blockchain of archiver.py.
+#
+## How it works:
+#	1.	ArchiveRecorder.track() decorates a function: every call is recorded with the
+#	    	    function's name, its arguments as parameters, its dataset argument and its result.
+#	    	    ArchiveRecorder.run() does the same for a block of code (a context manager).
+#	2.	The instrumented code formats the record with str() at call time, so later changes
+#	    	    to mutable arguments or outputs are not archived, and puts it on a bounded queue.
+#	    	    When the queue is full the record is dropped and counted instead of stalling the caller.
+#	3.	A background thread turns the records into AIOperations, adds them to the blockchain
+#	    	    and mines a block once batch_size operations are pending or the oldest has waited
+#	    	    max_delay seconds. Errors are kept in last_error and never stop the thread.
+#	4.	flush() waits until everything queued so far is mined; close() also stops the thread,
+#	    	    and records made after it are dropped.
+#	    	    stats() reports queue depth, recorded, dropped and mined counts.
+#
+## How to Use:
+#	recorder = ArchiveRecorder(ai_blockchain, miner_address="Miner1")
+#
+#	@recorder.track(algorithm_name="Algorithm1")
+#	def train_step(dataset, learning_rate): ...
+#
+#	with recorder.run("Algorithm2", "Dataset2.csv", {"alpha": 0.1}) as run:
+#	    run.output = fit()
+#
+#	recorder.close()
+
+import functools
+import inspect
+import queue
+import threading
+import time
+
+from archiver import AIOperation
+
+# Queue item telling the worker to mine what is pending and exit; flush() queues a threading.Event
+STOP = "stop"
+
+
+class Run:
+    __slots__ = ("output",)
+
+    def __init__(self):
+        self.output = None
+
+
+class ArchiveRecorder:
+    def __init__(self, blockchain, miner_address, max_queue=10000, batch_size=256, max_delay=1.0):
+        """
+        Starts a recorder with its background mining thread.
+        :param blockchain: archiver Blockchain the records are mined into.
+        :param miner_address: Address rewarded for the mined blocks.
+        :param max_queue: Records waiting for the worker before new ones are dropped.
+        :param batch_size: Pending operations that trigger mining a block.
+        :param max_delay: Seconds a pending operation waits at most before a block is mined.
+        """
+        self.blockchain = blockchain
+        self.miner_address = miner_address
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.queue = queue.Queue(max_queue)
+        self.lock = threading.Lock()
+        self.recorded = 0
+        self.dropped = 0
+        self.blocks_mined = 0
+        self.last_error = None
+        self.closed = False
+        self.worker = threading.Thread(target=self.work, name="archive-recorder", daemon=True)
+        self.worker.start()
+
+    def record(self, algorithm_name, dataset, output, parameters, timestamp=None):
+        """
+        Queues a record without blocking. Returns False if it was dropped because the queue is full
+        or the recorder is closed.
+        """
+        try:
+            item = (algorithm_name, str(dataset), str(output), str(parameters), timestamp or time.time())
+        except Exception as error:
+            # A failing __str__ must not break the instrumented code
+            self.last_error = error
+            item = None
+        with self.lock:
+            # Checked together with the enqueue, so no record lands behind close()'s STOP
+            if item is not None and not self.closed:
+                try:
+                    self.queue.put_nowait(item)
+                    return True
+                except queue.Full:
+                    pass
+            self.dropped += 1
+            return False
+
+    def track(self, algorithm_name=None, dataset=None, dataset_argument="dataset"):
+        """
+        Decorator recording every call of the wrapped function.
+        :param algorithm_name: Recorded algorithm name; defaults to the function's qualified name.
+        :param dataset: Recorded dataset; defaults to the value of the `dataset_argument` argument.
+        :param dataset_argument: Argument holding the dataset.
+        """
+        def decorator(function):
+            name = algorithm_name or function.__qualname__
+            signature = inspect.signature(function)
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                try:
+                    output = function(*args, **kwargs)
+                except Exception as error:
+                    self.record_call(name, signature, args, kwargs, dataset, dataset_argument,
+                                     f"Failed: {error!r}")
+                    raise
+                self.record_call(name, signature, args, kwargs, dataset, dataset_argument, output)
+                return output
+            return wrapper
+        return decorator
+
+    def record_call(self, algorithm_name, signature, args, kwargs, dataset, dataset_argument, output):
+        """
+        Records a call captured by track(), with its arguments bound to their names.
+        """
+        try:
+            arguments = dict(signature.bind_partial(*args, **kwargs).arguments)
+        except TypeError as error:
+            self.last_error = error
+            arguments = {"args": args, "kwargs": kwargs}
+        if dataset is None:
+            dataset = arguments.pop(dataset_argument, None)
+        return self.record(algorithm_name, dataset, output, arguments)
+
+    def run(self, algorithm_name, dataset, parameters):
+        """
+        Context manager recording a block of code; set `output` on the yielded run.
+        """
+        return RecordedRun(self, algorithm_name, dataset, parameters)
+
+    def work(self):
+        pending_since = None
+        while True:
+            timeout = None
+            if pending_since is not None:
+                timeout = max(0.0, pending_since + self.max_delay - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, tuple):
+                try:
+                    self.blockchain.add_operation(AIOperation(*item))
+                    self.recorded += 1
+                except Exception as error:
+                    self.last_error = error
+                    with self.lock:
+                        self.dropped += 1
+                if pending_since is None:
+                    pending_since = time.monotonic()
+
+            pending = len(self.blockchain.pending_operations)
+            due = pending_since is not None and time.monotonic() >= pending_since + self.max_delay
+            if pending and (pending >= self.batch_size or due or item is not None and not isinstance(item, tuple)):
+                self.mine()
+                pending_since = None
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item == STOP:
+                return
+
+    def mine(self):
+        try:
+            self.blockchain.mine_pending_operations(self.miner_address)
+            self.blocks_mined += 1
+        except Exception as error:
+            self.last_error = error
+
+    def flush(self):
+        """
+        Blocks until every record queued before the call is mined into a block.
+        """
+        with self.lock:
+            closed = self.closed
+            if not closed:
+                if not self.worker.is_alive():
+                    raise RuntimeError("Recorder worker is not running")
+                done = threading.Event()
+                # The worker takes an item off the queue before it needs the lock, so this cannot deadlock
+                self.queue.put(done)
+        if closed:
+            # close() mines everything queued before it
+            self.worker.join()
+            return
+        done.wait()
+
+    def close(self):
+        """
+        Mines the remaining records and stops the worker thread.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.queue.put(STOP)
+        self.worker.join()
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "blocks_mined": self.blocks_mined,
+            "last_error": self.last_error,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class RecordedRun:
+    def __init__(self, recorder, algorithm_name, dataset, parameters):
+        self.recorder = recorder
+        self.algorithm_name = algorithm_name
+        self.dataset = dataset
+        self.parameters = parameters
+        self.run = Run()
+
+    def __enter__(self):
+        return self.run
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        output = self.run.output if exc_type is None else f"Failed: {exc_value!r}"
+        self.recorder.record(self.algorithm_name, self.dataset, output, self.parameters)
+        return False
+
+
+# Example usage
+if __name__ == "__main__":
+    from archiver import Blockchain
+
+    ai_blockchain = Blockchain(difficulty=3)
+    recorder = ArchiveRecorder(ai_blockchain, miner_address="Miner1", batch_size=100)
+
+    @recorder.track(algorithm_name="Algorithm1")
+    def train_step(dataset, step, learning_rate=0.01):
+        return f"Loss: {1.0 / (step + 1):.4f}"
+
+    start = time.perf_counter()
+    for step in range(1000):
+        train_step("Dataset1.csv", step)
+    elapsed = time.perf_counter() - start
+    print(f"Instrumented calls took {elapsed / 1000 * 1e6:.1f}us each")
+
+    with recorder.run("Algorithm2", "Dataset2.csv", {"alpha": 0.1, "max_iter": 100}) as run:
+        run.output = "Regression Output: [3.5, 4.1, 5.2]"
+
+    recorder.flush()
+    print(recorder.stats())
+    recorder.close()
+    print(f"Blocks: {len(ai_blockchain.chain)}, Is Blockchain Valid? {ai_blockchain.is_chain_valid()}")
+    print(ai_blockchain.chain[-1].operations[-2])
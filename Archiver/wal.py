@@ -0,0 +1,204 @@
+## Write-ahead log for the pending AI operations of archiver.py.
+#
+## How it works:
+#	1.	Every operation passed to add_operation is appended to the log as a record
+#	    	    [u32 length][u32 crc32][pickle of the operation's fields] before add_operation returns.
+#	    	    Pickle keeps outputs and parameters exactly as given (tuples, numpy arrays, ...), so a
+#	    	    replayed operation hashes like the logged one; the log is only read by the node that wrote it.
+#	2.	Appends are durable once fsync'ed. Concurrent callers share fsyncs (group commit):
+#	    	    the first caller to wait becomes the leader and fsyncs everything written so far,
+#	    	    the others wait for it and return without an fsync of their own.
+#	3.	On restart the log is replayed into the pending operations. A torn record at the end
+#	    	    (from a crash in the middle of a write) is cut off.
+#	4.	Once a block holding the logged operations is sealed, those records are dropped
+#	    	    from the log; operations added meanwhile are kept.
+#
+## How to Use:
+#	log = OperationLog("pending.wal")
+#	ai_blockchain = Blockchain(difficulty=3, log=log)  # replays what a crashed run left behind
+#	ai_blockchain.add_operation(operation)  # returns once the operation is on disk
+
+import os
+import pickle
+import struct
+import threading
+import zlib
+
+RECORD = struct.Struct("<II")  # payload length, crc32 of the payload
+
+OPERATION_FIELDS = ("algorithm_name", "dataset", "output", "parameters", "timestamp",
+                    "dataset_digest", "dataset_size")
+
+
+def encode_operation(operation):
+    fields = {field: getattr(operation, field) for field in OPERATION_FIELDS}
+    try:
+        return pickle.dumps(fields, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as error:
+        raise ValueError(f"Operation cannot be written to the log: {error!r}") from error
+
+
+class OperationLog:
+    def __init__(self, path):
+        """
+        Opens (or creates) a write-ahead log.
+        :param path: Log file.
+        """
+        self.path = path
+        self.condition = threading.Condition()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        # Positions count bytes ever written, so they stay valid when the log is truncated
+        self.start = 0  # position of the first byte in the file
+        self.written = os.fstat(self.fd).st_size
+        self.synced = self.written
+        self.syncing = False
+        self.fsyncs = 0
+
+    def replay(self):
+        """
+        Reads back the logged operations, oldest first, and cuts off a torn last record.
+        """
+        from archiver import AIOperation
+
+        with self.condition:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            operations = []
+            offset = 0
+            while offset + RECORD.size <= len(data):
+                length, crc = RECORD.unpack_from(data, offset)
+                payload = data[offset + RECORD.size:offset + RECORD.size + length]
+                if len(payload) != length or zlib.crc32(payload) != crc:
+                    break
+                operations.append(AIOperation(**pickle.loads(payload)))
+                offset += RECORD.size + length
+            if offset != len(data):
+                os.ftruncate(self.fd, offset)
+                os.fsync(self.fd)
+                self.written = self.synced = self.start + offset
+            return operations
+
+    def write(self, operation):
+        """
+        Appends an operation without waiting for the disk. Returns the position to pass to sync().
+        Raises ValueError if the operation cannot be logged.
+        """
+        payload = encode_operation(operation)
+        record = memoryview(RECORD.pack(len(payload), zlib.crc32(payload)) + payload)
+        with self.condition:
+            while record:
+                record = record[os.write(self.fd, record):]
+            self.written += RECORD.size + len(payload)
+            return self.written
+
+    def sync(self, position):
+        """
+        Waits until everything up to `position` is on disk, fsyncing on behalf of all
+        callers waiting at the same time.
+        """
+        with self.condition:
+            while self.synced < position:
+                if self.syncing:
+                    self.condition.wait()
+                    continue
+                self.syncing = True
+                target = self.written
+                fd = self.fd
+                self.condition.release()
+                try:
+                    os.fsync(fd)
+                finally:
+                    self.condition.acquire()
+                    self.syncing = False
+                    self.condition.notify_all()
+                self.fsyncs += 1
+                self.synced = max(self.synced, target)
+
+    def append(self, operation):
+        """
+        Appends an operation and returns once it is durable.
+        """
+        self.sync(self.write(operation))
+
+    def mark(self):
+        """
+        Returns the current end of the log, for truncate() once the operations before it are sealed.
+        """
+        with self.condition:
+            return self.written
+
+    def truncate(self, position):
+        """
+        Drops the records before `position`; records written after it are kept.
+        """
+        with self.condition:
+            # The file descriptor may be replaced below, so let a running fsync finish first
+            while self.syncing:
+                self.condition.wait()
+            if position <= self.start:
+                return
+            if position == self.written:
+                os.ftruncate(self.fd, 0)
+                os.fsync(self.fd)
+            else:
+                with open(self.path, "rb") as f:
+                    f.seek(position - self.start)
+                    tail = f.read()
+                temporary_path = self.path + ".tmp"
+                with open(temporary_path, "wb") as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporary_path, self.path)
+                os.close(self.fd)
+                self.fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+            self.start = position
+            # Whatever is left in the file has just been fsync'ed
+            self.synced = self.written
+
+    def close(self):
+        with self.condition:
+            while self.syncing:
+                self.condition.wait()
+            if self.fd is not None:
+                os.fsync(self.fd)
+                os.close(self.fd)
+                self.fd = None
+
+    def __len__(self):
+        return self.written - self.start
+
+    def __repr__(self):
+        return f"OperationLog(path={self.path}, bytes={len(self)}, fsyncs={self.fsyncs})"
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from archiver import AIOperation, Blockchain
+
+    log_path = os.path.join(tempfile.mkdtemp(), "pending.wal")
+    ai_blockchain = Blockchain(difficulty=2, log=OperationLog(log_path))
+
+    def record_step(step):
+        ai_blockchain.add_operation(AIOperation(
+            algorithm_name="Algorithm1",
+            dataset="Dataset1.csv",
+            output=f"Loss at step {step}",
+            parameters="{'learning_rate': 0.01}"
+        ))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(16) as pool:
+        list(pool.map(record_step, range(2000)))
+    print(f"Logged 2000 operations in {time.perf_counter() - start:.3f}s: {ai_blockchain.log}")
+
+    # A restarted process finds the operations that were not sealed yet
+    ai_blockchain.log.close()
+    restarted = Blockchain(difficulty=2, log=OperationLog(log_path))
+    print(f"Replayed pending operations: {len(restarted.pending_operations)}")
+    restarted.mine_pending_operations(miner_address="Miner1")
+    print(f"Log after sealing: {restarted.log}")
+    restarted.log.close()
@@ -0,0 +1,408 @@
+## Mining, sealing and validation engine shared by the single-chain ledger scripts:
+#	dataManager/blockchain.py, Archiver/archiver.py and
+#	AIverManager/SingleChainBlockchain/AIverManager.py.
+#
+## What it provides:
+#	1.	Mining: mine_nonce() hashes the block prefix once and only the nonce digits per
+#	    	    attempt; with workers > 1 the nonce space is split across processes and the
+#	    	    lowest solving nonce is returned, the same one a single-core search finds.
+#	2.	Sealing: ProofOfWork and AuthoritySealer (HMAC seals for permissioned ledgers), the
+#	    	    SealedBlock mixin that checks either kind of seal, and SealedChain, which fixes
+#	    	    the one way a chain's blocks must be sealed (PROOF_OF_WORK or AUTHORITY).
+#	3.	Validation: the ValidatedChain mixin gives a chain is_chain_valid(), validate() with a
+#	    	    persisted watermark and a sharded full audit, and ValidationReport. Blocks are
+#	    	    decoded VALIDATION_WINDOW at a time and pool workers are handed height ranges, so a
+#	    	    chain kept in a BlockStore is never decoded into one list.
+#
+## How to Use (the scripts add this directory to sys.path):
+#	from ledger_engine import SealedChain, ValidatedChain, mine_nonce
+#
+#	class Blockchain(SealedChain, ValidatedChain):
+#	    ...  # needs self.chain, self.difficulty, self.watermark_path and self.watermark
+#
+# Each block class provides check(difficulty, keyring, sealing), returning the reason it is
+# invalid or None; SealedBlock provides one for blocks with hash_prefix() and calculate_hash().
+
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+
+# Nonces handed to a parallel mining worker at a time
+NONCE_CHUNK = 4096
+NO_SOLUTION = 2 ** 63 - 1
+
+# How a chain's blocks are sealed; see SealedChain.configure_sealing
+PROOF_OF_WORK = "proof-of-work"
+AUTHORITY = "authority"
+
+# Blocks decoded at a time while validating
+VALIDATION_WINDOW = 1024
+
+
+def meets_difficulty(digest, difficulty):
+    """
+    Checks whether a raw SHA-256 digest starts with `difficulty` zero hex digits.
+    Equivalent to hexdigest()[:difficulty] == '0' * difficulty without building the hex string.
+    """
+    full_bytes, half_byte = divmod(difficulty, 2)
+    if digest[:full_bytes] != bytes(full_bytes):
+        return False
+    return not half_byte or digest[full_bytes] < 0x10
+
+
+def search_nonces(prefix, difficulty, start, worker_index, workers, best_nonce):
+    """
+    Parallel mining worker: scans nonce chunks worker_index, worker_index + workers, ...
+    and records the lowest solving nonce in the shared best_nonce value.
+    Stops once every nonce it could still try is above the best solution found so far.
+    """
+    midstate = hashlib.sha256(prefix)
+    chunk = worker_index
+    while True:
+        low = start + chunk * NONCE_CHUNK
+        if low > best_nonce.value:
+            return
+        for nonce in range(low, low + NONCE_CHUNK):
+            attempt = midstate.copy()
+            attempt.update(str(nonce).encode())
+            if meets_difficulty(attempt.digest(), difficulty):
+                with best_nonce.get_lock():
+                    if nonce < best_nonce.value:
+                        best_nonce.value = nonce
+                return
+        chunk += workers
+
+
+def mine_nonce_parallel(prefix, difficulty, start, workers):
+    """
+    Searches the nonce space from `start` with a pool of worker processes.
+    Returns the lowest solving nonce, i.e. the same nonce a single-core search finds.
+    """
+    best_nonce = multiprocessing.Value('q', NO_SOLUTION)
+    processes = [
+        multiprocessing.Process(target=search_nonces,
+                                args=(prefix, difficulty, start, index, workers, best_nonce))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    # A worker that died may have held the lowest solution, so the result would not be deterministic
+    failed = [process.exitcode for process in processes if process.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"Mining worker exited with code {failed[0]}")
+    if best_nonce.value == NO_SOLUTION:
+        raise RuntimeError("Mining workers found no valid nonce")
+    return best_nonce.value
+
+
+def mine_nonce(prefix, difficulty, start=0, workers=1):
+    """
+    Finds the lowest nonce from `start` whose hash meets the difficulty.
+    :param prefix: Bytes hashed before the nonce's decimal digits.
+    :param workers: Number of processes searching the nonce space.
+    :return: (nonce, hex digest of prefix + nonce)
+    """
+    if workers > 1:
+        nonce = mine_nonce_parallel(prefix, difficulty, start, workers)
+        return nonce, hashlib.sha256(prefix + str(nonce).encode()).hexdigest()
+
+    # The prefix is fed to SHA-256 once; each attempt only copies that midstate and hashes the nonce digits
+    midstate = hashlib.sha256(prefix)
+    nonce = start
+    while True:
+        attempt = midstate.copy()
+        attempt.update(str(nonce).encode())
+        digest = attempt.digest()
+        if meets_difficulty(digest, difficulty):
+            return nonce, digest.hex()
+        nonce += 1
+
+
+class SealedBlock:
+    """
+    Mixin for blocks sealed by proof-of-work or by an authority's HMAC. The block class
+    provides hash_prefix() (str) and calculate_hash(), and sets `signer` and `seal` to None.
+    """
+
+    def mine_block(self, difficulty, workers=1):
+        """
+        Mines the block by finding a hash with a specific number of leading zeros.
+        :param difficulty: Number of leading zeros required.
+        :param workers: Number of processes searching the nonce space.
+        """
+        self.nonce, self.hash = mine_nonce(self.hash_prefix().encode(), difficulty, self.nonce, workers)
+
+    def seal_message(self):
+        return f"{self.signer}:{self.hash}".encode()
+
+    def authority_seal(self, key, signer):
+        """
+        Seals the block with an HMAC of its hash instead of proof-of-work.
+        :param key: Secret key of the signer.
+        :param signer: Key id under which validators find the key in their keyring.
+        """
+        self.hash = self.calculate_hash()
+        self.signer = signer
+        self.seal = hmac.new(key, self.seal_message(), hashlib.sha256).hexdigest()
+
+    def check_seal(self, difficulty, keyring, sealing=PROOF_OF_WORK):
+        """
+        Checks the block's proof-of-work, or its HMAC seal if an authority sealed it.
+        :param sealing: How the chain's blocks must be sealed, PROOF_OF_WORK or AUTHORITY.
+        :return: The reason the seal is invalid, or None.
+        """
+        if self.seal is None:
+            # Anyone can mine a block, so an authority chain must not accept one
+            if sealing == AUTHORITY:
+                return "Proof-of-work block in an authority-sealed chain"
+            if not meets_difficulty(bytes.fromhex(self.hash), difficulty):
+                return "Block hash does not meet the difficulty"
+            return None
+        if sealing != AUTHORITY:
+            return "Authority-sealed block in a proof-of-work chain"
+        key = (keyring or {}).get(self.signer)
+        if key is None:
+            return f"Block is sealed by unknown signer {self.signer}"
+        expected = hmac.new(key, self.seal_message(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, self.seal):
+            return "Block seal does not match its signer's key"
+        return None
+
+    def check(self, difficulty, keyring=None, sealing=PROOF_OF_WORK):
+        """
+        Checks the block's hash against its content, then its seal.
+        :return: The reason the block is invalid, or None.
+        """
+        if self.hash != self.calculate_hash():
+            return "Block hash does not match its content"
+        return self.check_seal(difficulty, keyring, sealing)
+
+
+class ProofOfWork:
+    sealing = PROOF_OF_WORK
+
+    def __init__(self, difficulty, workers=1):
+        """
+        Seals blocks by mining them.
+        :param difficulty: Number of leading zeros required.
+        :param workers: Number of processes searching the nonce space.
+        """
+        self.difficulty = difficulty
+        self.workers = workers
+
+    def seal(self, block):
+        block.mine_block(self.difficulty, self.workers)
+
+
+class AuthoritySealer:
+    sealing = AUTHORITY
+
+    def __init__(self, keyring, signer):
+        """
+        Seals blocks with an HMAC, for ledgers where only known authorities add blocks.
+        :param keyring: Mapping of key id to secret key (bytes).
+        :param signer: Key id this node signs with.
+        """
+        if signer not in keyring:
+            raise ValueError(f"Signer {signer} is not in the keyring")
+        self.keyring = keyring
+        self.signer = signer
+
+    def seal(self, block):
+        block.authority_seal(self.keyring[self.signer], self.signer)
+
+
+class SealedChain:
+    """
+    Mixin for chains whose new blocks are sealed by a configurable sealer.
+    """
+
+    def configure_sealing(self, difficulty, workers, sealer, keyring, sealing):
+        """
+        :param difficulty: Mining difficulty; a ProofOfWork sealer's own difficulty overrides it,
+            so blocks are validated at the difficulty they are mined at.
+        :param workers: Number of processes used to mine each block.
+        :param sealer: How new blocks are sealed, e.g. AuthoritySealer; None mines at `difficulty`.
+        :param keyring: Keys for validating authority-sealed blocks; defaults to the sealer's keyring.
+        :param sealing: How every block must be sealed, PROOF_OF_WORK or AUTHORITY; defaults to the
+            sealer's, or to AUTHORITY when there is a keyring.
+        """
+        self.difficulty = getattr(sealer, "difficulty", difficulty)
+        self.workers = workers
+        self.sealer = sealer
+        self.keyring = keyring if keyring is not None else getattr(sealer, "keyring", None)
+        if sealing is None:
+            sealing = getattr(sealer, "sealing", AUTHORITY if self.keyring is not None else PROOF_OF_WORK)
+        self.sealing = sealing
+
+    def seal_block(self, block):
+        """
+        Seals a new block with the configured sealer, or by mining it at the chain's difficulty.
+        """
+        if self.sealer is None:
+            block.mine_block(self.difficulty, self.workers)
+        else:
+            self.sealer.seal(block)
+
+
+class ValidationReport:
+    def __init__(self, valid, checked_from, checked_to, failed_height=None, reason=None):
+        """
+        Outcome of a chain validation.
+        :param valid: True if every checked block passed.
+        :param checked_from: First height that was checked.
+        :param checked_to: Last height that was checked.
+        :param failed_height: Height of the first failing block, if any.
+        :param reason: Why that block failed.
+        """
+        self.valid = valid
+        self.checked_from = checked_from
+        self.checked_to = checked_to
+        self.failed_height = failed_height
+        self.reason = reason
+
+    def __bool__(self):
+        return self.valid
+
+    def __repr__(self):
+        return (f"ValidationReport(valid={self.valid}, checked_from={self.checked_from}, "
+                f"checked_to={self.checked_to}, failed_height={self.failed_height}, reason={self.reason})")
+
+
+def check_blocks(blocks, first_height, previous_hash, difficulty=0, keyring=None, sealing=PROOF_OF_WORK):
+    """
+    Checks the hashes and seals of a run of consecutive blocks and the links between them.
+    :param blocks: Blocks at heights first_height, first_height + 1, ...
+    :param first_height: Height of blocks[0].
+    :param previous_hash: Hash of the block before blocks[0].
+    :param difficulty: Difficulty proof-of-work blocks must meet.
+    :param keyring: Mapping of key id to secret key for authority-sealed blocks.
+    :param sealing: How every block must be sealed, PROOF_OF_WORK or AUTHORITY.
+    :return: (height, reason) of the first failing block, or None.
+    """
+    for offset, block in enumerate(blocks):
+        height = first_height + offset
+        reason = block.check(difficulty, keyring, sealing)
+        if reason is not None:
+            return height, reason
+        if block.previous_hash != previous_hash:
+            return height, "Previous hash does not match the preceding block"
+        previous_hash = block.hash
+    return None
+
+
+def check_range(chain, low, high, previous_hash, difficulty=0, keyring=None, sealing=PROOF_OF_WORK):
+    """
+    Checks the blocks at heights [low, high) VALIDATION_WINDOW blocks at a time, carrying the
+    hash of each window's last block into the next, so a chain kept in a BlockStore is never
+    decoded into one list.
+    :param chain: The chain's blocks, a list or anything else that can be sliced by height.
+    :param previous_hash: Hash of the block at height low - 1.
+    :return: (height, reason) of the first failing block, or None.
+    """
+    for window in range(low, high, VALIDATION_WINDOW):
+        blocks = chain[window:min(window + VALIDATION_WINDOW, high)]
+        failure = check_blocks(blocks, window, previous_hash, difficulty, keyring, sealing)
+        if failure is not None:
+            return failure
+        previous_hash = blocks[-1].hash
+    return None
+
+
+# The chain a validation pool's workers read their shards from, set once per worker process
+shard_chain = None
+
+
+def share_chain(chain):
+    global shard_chain
+    shard_chain = chain
+
+
+def check_shard(low, high, previous_hash, difficulty, keyring, sealing):
+    """
+    Validation pool worker: checks the heights [low, high) of the shared chain.
+    """
+    return check_range(shard_chain, low, high, previous_hash, difficulty, keyring, sealing)
+
+
+class ValidatedChain:
+    """
+    Mixin for chains validated block by block. The chain class sets self.chain (a list or a
+    BlockStore), self.difficulty, self.watermark_path and self.watermark = self.load_watermark(),
+    and may set self.keyring and self.sealing.
+    """
+
+    def load_watermark(self):
+        """
+        Reads the persisted validation watermark, if there is one.
+        """
+        if self.watermark_path is None or not os.path.exists(self.watermark_path):
+            return None
+        with open(self.watermark_path) as f:
+            state = json.load(f)
+        return state["height"], state["hash"]
+
+    def save_watermark(self, height):
+        """
+        Records that every block up to `height` has been validated.
+        """
+        self.watermark = (height, self.chain[height].hash)
+        if self.watermark_path is None:
+            return
+        tmp_path = self.watermark_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"height": height, "hash": self.watermark[1]}, f)
+        os.replace(tmp_path, self.watermark_path)
+
+    def validate(self, full=False, workers=1):
+        """
+        Validates the chain and reports the first failing block.
+        :param full: Re-check every block instead of only those above the watermark.
+        :param workers: Number of processes a full check is sharded across.
+        :return: A ValidationReport.
+        """
+        length = len(self.chain)
+        start = 1
+        if not full and self.watermark is not None:
+            height, block_hash = self.watermark
+            # Only trust the watermark if the block it names is still in place
+            if height < length and self.chain[height].hash == block_hash:
+                start = height + 1
+        if start >= length:
+            return ValidationReport(True, start, length - 1)
+
+        rules = (self.difficulty, getattr(self, "keyring", None), getattr(self, "sealing", PROOF_OF_WORK))
+        if workers > 1 and length - start > workers:
+            shard_size = -(-(length - start) // workers)
+            # Workers get height ranges, and the hash each range's first block must link to
+            shards = [(low, min(low + shard_size, length), self.chain[low - 1].hash) + rules
+                      for low in range(start, length, shard_size)]
+            # A BlockStore hands the workers a read-only view instead of itself
+            shared = self.chain.view() if hasattr(self.chain, "view") else self.chain
+            with multiprocessing.Pool(len(shards), initializer=share_chain, initargs=(shared,)) as pool:
+                results = pool.starmap(check_shard, shards)
+            failures = [result for result in results if result is not None]
+        else:
+            result = check_range(self.chain, start, length, self.chain[start - 1].hash, *rules)
+            failures = [] if result is None else [result]
+
+        if failures:
+            failed_height, reason = min(failures)
+            if failed_height > start:
+                self.save_watermark(failed_height - 1)
+            return ValidationReport(False, start, length - 1, failed_height, reason)
+
+        self.save_watermark(length - 1)
+        return ValidationReport(True, start, length - 1)
+
+    def is_chain_valid(self):
+        """
+        Validates the blockchain's integrity by re-checking every block. validate() is the opt-in
+        incremental check: it trusts the blocks below the watermark, so it cannot notice later
+        in-memory edits to them.
+        """
+        return self.validate(full=True).valid
@@ -12,43 +12,199 @@
 #	The quantize function converts the continuous data into discrete levels.
 #	4.	Feature Extraction:
 #	The extract_features function calculates statistical features (e.g., mean, standard deviation).
+#	WindowFeatureExtractor calculates them per sliding window in O(n), for millions of windows.
 #	5.	Encoding:
 #	The one_hot_encode function converts discrete feature values into a one-hot encoded representation.
+#	Each step also takes a 2-D (channels x samples) array and an axis, and preprocess_batch
+#	runs steps 1-4 over all channels at once.
+#	6.	Streaming:
+#	StreamingPipeline runs steps 1-3 chunk by chunk, carrying the filter state and the sampling
+#	phase across chunks, so the output equals the one-shot result with bounded memory.
+
+from functools import lru_cache
 
 import numpy as np
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from scipy.signal import butter, lfilter
+from scipy.signal import butter, lfilter, sosfilt
 
 
 # 1. Filter Function
-def butter_lowpass_filter(data, cutoff, fs, order=5):
+# The design is cached per (cutoff, fs, order, output), so filtering many signals designs the filter once.
+# output='sos' gives second-order sections, which stay numerically stable at high orders.
+# The returned arrays are shared between callers and must not be modified.
+@lru_cache(maxsize=64)
+def butter_lowpass_coefficients(cutoff, fs, order=5, output='ba'):
     nyquist = 0.5 * fs
     normal_cutoff = cutoff / nyquist
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
-    y = lfilter(b, a, data)
+    return butter(order, normal_cutoff, btype='low', analog=False, output=output)
+
+
+# Filters along `axis`, so a (channels x samples) array is filtered channel by channel in one call
+def butter_lowpass_filter(data, cutoff, fs, order=5, axis=-1, sos=False):
+    if sos:
+        return sosfilt(butter_lowpass_coefficients(cutoff, fs, order, output='sos'), data, axis=axis)
+    b, a = butter_lowpass_coefficients(cutoff, fs, order)
+    y = lfilter(b, a, data, axis=axis)
     return y
 
 
 # 2. Sampler Function
-def downsample(data, factor):
-    return data[::factor]
+def downsample(data, factor, axis=-1):
+    if np.ndim(data) <= 1:
+        return data[::factor]
+    index = [slice(None)] * np.ndim(data)
+    index[axis] = slice(None, None, factor)
+    return data[tuple(index)]
 
 
 # 3. Quantizer Function
-def quantize(data, num_levels):
-    min_val, max_val = np.min(data), np.max(data)
+# value_range=(min, max) fixes the range instead of taking it from the data, so chunks of a
+# stream are quantized alike; values outside the range are clipped to it.
+# With an axis (and no value_range), each channel is quantized over its own range.
+def quantize(data, num_levels, value_range=None, axis=None):
+    if value_range is None:
+        min_val = np.min(data, axis=axis, keepdims=axis is not None)
+        max_val = np.max(data, axis=axis, keepdims=axis is not None)
+    else:
+        min_val, max_val = value_range
+        data = np.clip(data, min_val, max_val)
     step = (max_val - min_val) / num_levels
-    quantized = np.floor((data - min_val) / step) * step + min_val
+    # One temporary, updated in place, instead of one per arithmetic step
+    quantized = np.subtract(data, min_val, dtype=float)
+    quantized /= step
+    np.floor(quantized, out=quantized)
+    quantized *= step
+    quantized += min_val
     return quantized
 
 
 # 4. Feature Extraction Function
-def extract_features(data):
+# With an axis, features are computed per channel and stacked along a new last axis
+def extract_features(data, axis=None):
     # Example: Mean, Standard Deviation, and Max
-    mean = np.mean(data)
-    std = np.std(data)
-    maximum = np.max(data)
-    return np.array([mean, std, maximum])
+    mean = np.mean(data, axis=axis)
+    std = np.std(data, axis=axis)
+    maximum = np.max(data, axis=axis)
+    return np.stack([mean, std, maximum], axis=-1)
+
+
+# 4b. Sliding-Window Features
+# Windows start every `hop` samples and are `window` samples long; only complete windows are used.
+def window_starts(length, window, hop=1):
+    return np.arange(0, length - window + 1, hop)
+
+
+# Strided view of the windows, (windows x window), without copying the data
+def sliding_windows(data, window, hop=1):
+    return np.lib.stride_tricks.sliding_window_view(np.asarray(data), window)[::hop]
+
+
+# Mean and standard deviation of every window in O(n), laid out like rolling_max below: within
+# blocks of `window` samples, running sums from the left and from the right, each over the data
+# minus its block's mean so that only local variation enters the squares. A window is the
+# right-running part of one block and the left-running part of the next, merged with Chan's
+# pairwise formula, so neither a large offset nor a drifting level cancels the variance.
+def rolling_mean_std(data, window, hop=1):
+    data = np.asarray(data, dtype=float)
+    blocks = -(-len(data) // window)
+    padded = np.empty(blocks * window)
+    padded[:len(data)] = data
+    padded[len(data):] = data[-1] if len(data) else 0.0
+    padded = padded.reshape(blocks, window)
+    shift = padded.mean(axis=1, keepdims=True)
+    centered = padded - shift
+
+    counts = np.arange(1, window + 1)
+    left_sums = np.cumsum(centered, axis=1)
+    left_means = left_sums / counts
+    left_m2 = np.cumsum(centered * centered, axis=1) - left_sums * left_means
+    right_sums = np.cumsum(centered[:, ::-1], axis=1)[:, ::-1]
+    right_means = right_sums / counts[::-1]
+    right_m2 = np.cumsum((centered * centered)[:, ::-1], axis=1)[:, ::-1] - right_sums * right_means
+    left_means = (left_means + shift).ravel()
+    right_means = (right_means + shift).ravel()
+    left_m2 = left_m2.ravel()
+    right_m2 = right_m2.ravel()
+
+    starts = window_starts(len(data), window, hop)
+    ends = starts + window - 1
+    # Samples from the next block; a window starting on a block boundary has none
+    next_count = starts % window
+    has_next = next_count > 0
+    delta = np.where(has_next, left_means[ends] - right_means[starts], 0.0)
+    mean = right_means[starts] + delta * next_count / window
+    m2 = (right_m2[starts] + np.where(has_next, left_m2[ends], 0.0) +
+          delta * delta * (window - next_count) * next_count / window)
+    return mean, np.sqrt(np.maximum(m2 / window, 0.0))
+
+
+# Maximum of every window in O(n) with the van Herk/Gil-Werman algorithm: within blocks of
+# `window` samples, a running max from the left and from the right; every window spans at most
+# two blocks, so its max is the right-running max at its start and the left-running max at its end.
+# Vectorized, this does the work of a monotonic queue without a Python loop per sample.
+def rolling_max(data, window, hop=1):
+    data = np.asarray(data, dtype=float)
+    blocks = -(-len(data) // window)
+    padded = np.full(blocks * window, -np.inf)
+    padded[:len(data)] = data
+    padded = padded.reshape(blocks, window)
+    from_left = np.maximum.accumulate(padded, axis=1).ravel()
+    from_right = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    starts = window_starts(len(data), window, hop)
+    return np.maximum(from_right[starts], from_left[starts + window - 1])
+
+
+# Built-in window features: name -> function(data, window, hop) returning one value per window.
+# Register further O(n) features here; any other callable passed to WindowFeatureExtractor is
+# applied to the strided (windows x window) view instead.
+WINDOW_FEATURES = {
+    "mean": lambda data, window, hop: rolling_mean_std(data, window, hop)[0],
+    "std": lambda data, window, hop: rolling_mean_std(data, window, hop)[1],
+    "max": rolling_max,
+    "min": lambda data, window, hop: -rolling_max(-np.asarray(data, dtype=float), window, hop),
+}
+
+
+class WindowFeatureExtractor:
+    def __init__(self, window, hop=1, features=("mean", "std", "max")):
+        if window < 1 or hop < 1:
+            raise ValueError(f"window and hop must be at least 1, got window={window}, hop={hop}")
+        for feature in features:
+            if not callable(feature) and feature not in WINDOW_FEATURES:
+                raise ValueError(f"Unknown window feature {feature!r}")
+        self.window = window
+        self.hop = hop
+        self.features = tuple(features)
+
+    # Returns a (windows x features) array for a 1-D signal
+    def transform(self, data):
+        data = np.asarray(data, dtype=float)
+        if data.ndim != 1:
+            raise ValueError(f"Expected a 1-D signal, got an array of shape {data.shape}")
+        if len(data) < self.window:
+            return np.empty((0, len(self.features)))
+        columns = []
+        moments = None
+        for feature in self.features:
+            if feature in ("mean", "std"):
+                # Both come from the same cumulative sums
+                if moments is None:
+                    moments = rolling_mean_std(data, self.window, self.hop)
+                columns.append(moments[0] if feature == "mean" else moments[1])
+            elif callable(feature):
+                columns.append(feature(sliding_windows(data, self.window, self.hop)))
+            else:
+                columns.append(WINDOW_FEATURES[feature](data, self.window, self.hop))
+        return np.column_stack(columns)
+
+
+# Steps 1-4 for a (channels x samples) array in one vectorized pass per step.
+# Returns the quantized signals and a (channels x 3) feature array.
+def preprocess_batch(signals, cutoff, fs, order=5, factor=1, num_levels=10, sos=False, axis=-1):
+    filtered = butter_lowpass_filter(signals, cutoff, fs, order, axis=axis, sos=sos)
+    sampled = downsample(filtered, factor, axis=axis)
+    quantized = quantize(sampled, num_levels, axis=axis)
+    return quantized, extract_features(quantized, axis=axis)
 
 
 # 5. Encoding Function
@@ -59,6 +215,54 @@ def one_hot_encode(features, categories):
     return encoded
 
 
+# 6. Streaming Pipeline
+# Filters, downsamples and (optionally) quantizes a signal that arrives in chunks.
+# Concatenating the outputs of process() gives the same result as running butter_lowpass_filter,
+# downsample and quantize(..., value_range) on the whole signal, while only the filter state
+# (order values) is kept between chunks.
+class StreamingPipeline:
+    def __init__(self, cutoff, fs, order=5, factor=1, num_levels=None, value_range=None):
+        if num_levels is not None and value_range is None:
+            raise ValueError("Streaming quantization needs a fixed value_range")
+        self.b, self.a = butter_lowpass_coefficients(cutoff, fs, order)
+        self.factor = factor
+        self.num_levels = num_levels
+        self.value_range = value_range
+        self.reset()
+
+    def reset(self):
+        # lfilter on a whole signal starts from a zero state
+        self.zi = np.zeros(max(len(self.a), len(self.b)) - 1)
+        # Samples to skip at the start of the next chunk to stay on the every-nth-sample grid
+        self.offset = 0
+        # Range of the downsampled signal seen so far, usable as value_range for a second pass
+        self.observed_range = None
+
+    def process(self, chunk):
+        chunk = np.asarray(chunk, dtype=float)
+        if not len(chunk):
+            # lfilter does not return the state unchanged for empty input
+            return chunk
+        filtered, self.zi = lfilter(self.b, self.a, chunk, zi=self.zi)
+
+        sampled = filtered[self.offset::self.factor]
+        self.offset = (self.offset - len(chunk)) % self.factor
+
+        if len(sampled):
+            low, high = np.min(sampled), np.max(sampled)
+            if self.observed_range is not None:
+                low, high = min(low, self.observed_range[0]), max(high, self.observed_range[1])
+            self.observed_range = (low, high)
+
+        if self.num_levels is None:
+            return sampled
+        return quantize(sampled, self.num_levels, self.value_range)
+
+    def process_stream(self, chunks):
+        for chunk in chunks:
+            yield self.process(chunk)
+
+
 # Example Workflow
 if __name__ == "__main__":
     # Simulated Signal Data
@@ -86,4 +290,30 @@ if __name__ == "__main__":
     print("Downsampled Signal:", downsampled_signal)
     print("Quantized Signal:", quantized_signal)
     print("Extracted Features:", features)
-    print("Encoded Features:\n", encoded_features)
\ No newline at end of file
+    window_features = WindowFeatureExtractor(window=10, hop=5).transform(quantized_signal)
+    print("Features per window (mean, std, max):", window_features.shape)
+    print("Encoded Features:\n", encoded_features)
+
+    # Steps 1-3 on the same signal arriving in chunks of 7 samples. The first pass finds the
+    # range of the downsampled signal, the second quantizes with it.
+    chunks = [signal[i:i + 7] for i in range(0, len(signal), 7)]
+    range_pass = StreamingPipeline(cutoff=0.2, fs=1.0, factor=2)
+    for _ in range_pass.process_stream(chunks):
+        pass
+    pipeline = StreamingPipeline(cutoff=0.2, fs=1.0, factor=2, num_levels=10,
+                                 value_range=range_pass.observed_range)
+    streamed_signal = np.concatenate(list(pipeline.process_stream(chunks)))
+    print("Streamed result matches one-shot result:", np.allclose(streamed_signal, quantized_signal))
+
+    # Steps 1-4 for 2000 short channels at once, compared with a loop over the channels
+    import time
+    recording = np.random.normal(0, 1, (2000, 500))
+    start = time.perf_counter()
+    looped = [extract_features(quantize(downsample(butter_lowpass_filter(channel, cutoff=0.2, fs=1.0), 2), 10))
+              for channel in recording]
+    loop_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    batch_quantized, batch_features = preprocess_batch(recording, cutoff=0.2, fs=1.0, factor=2, num_levels=10)
+    batch_seconds = time.perf_counter() - start
+    print(f"Batched features match: {np.allclose(batch_features, looped)}, "
+          f"loop {loop_seconds:.3f}s, batched {batch_seconds:.3f}s")
\ No newline at end of file
@@ -0,0 +1,336 @@
+## Benchmark suite for the ledger scripts:
+#	dataManager/blockchain.py, Archiver/archiver.py,
+#	AIverManager/SingleChainBlockchain/AIverManager.py and
+#	AIverManager/DAG-BasedBlockchain/AIverManager.py.
+#
+## Benchmarks:
+#	1.	mining: blocks/sec, hashes/sec and per-block latency percentiles for every
+#	    	    single-chain ledger, per difficulty and payload size.
+#	2.	validation: full chain validation time against chain length.
+#	3.	dag: DAGBlockchain.add_node latency against DAG size.
+#	4.	ingestion: Blockchain.add_transaction and Mempool.add throughput.
+#	5.	memory: peak traced memory per block while building a chain.
+#
+## How to Run:
+#	python benchmarks/ledger_benchmarks.py --output results.json
+#	python benchmarks/ledger_benchmarks.py --quick --only mining validation
+#
+# Synthetic data is generated from --seed, so two runs with the same arguments
+# benchmark the same chains. Results are written as JSON for comparing releases.
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# dataManager's add-on modules import `blockchain` by name
+sys.path.insert(0, os.path.join(ROOT, "dataManager"))
+
+import blockchain  # noqa: E402
+from mempool import Mempool  # noqa: E402
+
+
+def load_script(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+archiver = load_script("archiver", "Archiver/archiver.py")
+single_chain = load_script("single_chain_manager", "AIverManager/SingleChainBlockchain/AIverManager.py")
+dag = load_script("dag_manager", "AIverManager/DAG-BasedBlockchain/AIverManager.py")
+
+
+def payload(rng, size):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(size))
+
+
+# Each ledger as (name, record factory, add method name, mine function, chain class)
+def ledgers(rng, payload_size):
+    return [
+        ("dataManager",
+         lambda i: blockchain.Transaction(f"sender{i % 50}", f"recipient{i % 70}", payload(rng, payload_size)),
+         "add_transaction",
+         lambda chain: chain.mine_pending_transactions("Miner"),
+         blockchain.Blockchain),
+        ("Archiver",
+         lambda i: archiver.AIOperation(f"Algorithm{i % 20}", f"Dataset{i % 30}.csv",
+                                        payload(rng, payload_size), "{'epochs': 10}", timestamp=1700000000.0 + i),
+         "add_operation",
+         lambda chain: chain.mine_pending_operations("Miner"),
+         archiver.Blockchain),
+        ("SingleChainAIverManager",
+         lambda i: single_chain.Algorithm(f"Algorithm{i % 20}", f"{i // 20}.0", "2 years", "2030-01-01",
+                                          "policy.json", payload(rng, payload_size)),
+         "add_algorithm",
+         lambda chain: chain.mine_pending_algorithms(),
+         single_chain.Blockchain),
+    ]
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    return {
+        "min": ordered[0],
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+        "mean": sum(ordered) / len(ordered),
+    }
+
+
+def build_chain(factory, add, mine, chain_class, blocks, records_per_block, difficulty):
+    chain = chain_class(difficulty=difficulty)
+    latencies = []
+    record = 0
+    for _ in range(blocks):
+        for _ in range(records_per_block):
+            getattr(chain, add)(factory(record))
+            record += 1
+        start = time.perf_counter()
+        mine(chain)
+        latencies.append(time.perf_counter() - start)
+    return chain, latencies
+
+
+def bench_mining(args, rng):
+    results = []
+    for difficulty in args.difficulties:
+        for payload_size in args.payload_sizes:
+            for name, factory, add, mine, chain_class in ledgers(rng, payload_size):
+                chain, latencies = build_chain(factory, add, mine, chain_class, args.blocks,
+                                               args.records_per_block, difficulty)
+                elapsed = sum(latencies)
+                # Mining starts at nonce 0, so nonce + 1 hashes were tried per block
+                hashes = sum(block.nonce + 1 for block in chain.chain[1:])
+                results.append({
+                    "benchmark": "mining",
+                    "ledger": name,
+                    "params": {"difficulty": difficulty, "payload_size": payload_size,
+                               "blocks": args.blocks, "records_per_block": args.records_per_block},
+                    "metrics": {
+                        "blocks_per_sec": args.blocks / elapsed if elapsed else None,
+                        "hashes_per_sec": hashes / elapsed if elapsed else None,
+                        "block_latency_sec": percentiles(latencies),
+                    },
+                })
+    return results
+
+
+def bench_validation(args, rng):
+    results = []
+    for length in args.chain_lengths:
+        for name, factory, add, mine, chain_class in ledgers(rng, args.validation_payload_size):
+            chain, _ = build_chain(factory, add, mine, chain_class, length, args.records_per_block, 0)
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                report = chain.validate(full=True)
+                timings.append(time.perf_counter() - start)
+            assert report.valid, f"{name} chain failed validation: {report}"
+            results.append({
+                "benchmark": "validation",
+                "ledger": name,
+                "params": {"chain_length": length, "records_per_block": args.records_per_block,
+                           "payload_size": args.validation_payload_size},
+                "metrics": {
+                    "validate_sec": percentiles(timings),
+                    "blocks_per_sec": length / min(timings) if min(timings) else None,
+                },
+            })
+    return results
+
+
+def bench_dag(args, rng):
+    results = []
+    checkpoints = sorted(args.dag_sizes)
+    graph = dag.DAGBlockchain()
+    hashes = []
+    size = 0
+    for target in checkpoints:
+        window = []
+        while size < target:
+            # Each new version depends on up to args.dag_parents earlier versions
+            parents = rng.sample(hashes, min(len(hashes), rng.randint(0, args.dag_parents)))
+            adapter = dag.Aladapter(f"Adapter{size % 100}", f"{size // 100}.0", "2 years", "2030-01-01",
+                                    "policy.json", "Regulation A")
+            start = time.perf_counter()
+            node = graph.add_node(adapter, parents)
+            window.append(time.perf_counter() - start)
+            hashes.append(node.hash)
+            size += 1
+        results.append({
+            "benchmark": "dag",
+            "ledger": "DAGAIverManager",
+            "params": {"dag_size": target, "max_parents": args.dag_parents},
+            "metrics": {
+                "add_node_sec": percentiles(window),
+                "nodes_per_sec": len(window) / sum(window) if sum(window) else None,
+            },
+        })
+    start = time.perf_counter()
+    graph.validate_dag()
+    results.append({
+        "benchmark": "dag",
+        "ledger": "DAGAIverManager",
+        "params": {"dag_size": size, "max_parents": args.dag_parents, "operation": "validate_dag"},
+        "metrics": {"validate_dag_sec": time.perf_counter() - start},
+    })
+    return results
+
+
+def bench_ingestion(args, rng):
+    transactions = [blockchain.Transaction(f"sender{i % 50}", f"recipient{i % 70}",
+                                           payload(rng, args.validation_payload_size))
+                    for i in range(args.ingestion_transactions)]
+    results = []
+
+    chain = blockchain.Blockchain(difficulty=0)
+    start = time.perf_counter()
+    for tx in transactions:
+        chain.add_transaction(tx)
+    elapsed = time.perf_counter() - start
+    results.append({
+        "benchmark": "ingestion",
+        "ledger": "dataManager",
+        "params": {"transactions": len(transactions), "path": "Blockchain.add_transaction"},
+        "metrics": {"transactions_per_sec": len(transactions) / elapsed if elapsed else None},
+    })
+
+    chain = blockchain.Blockchain(difficulty=args.difficulties[0])
+    mempool = Mempool(chain, "Miner", max_size=len(transactions), max_transactions=args.records_per_block)
+    start = time.perf_counter()
+    for tx in transactions:
+        mempool.add(tx)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    sealed = mempool.flush()
+    sealing = time.perf_counter() - start
+    results.append({
+        "benchmark": "ingestion",
+        "ledger": "dataManager",
+        "params": {"transactions": len(transactions), "path": "Mempool.add",
+                   "max_transactions": args.records_per_block, "difficulty": args.difficulties[0]},
+        "metrics": {
+            "transactions_per_sec": len(transactions) / elapsed if elapsed else None,
+            "sealed_blocks": len(sealed),
+            "sealing_blocks_per_sec": len(sealed) / sealing if sealing else None,
+        },
+    })
+    return results
+
+
+def bench_memory(args, rng):
+    results = []
+    for payload_size in args.payload_sizes:
+        for name, factory, add, mine, chain_class in ledgers(rng, payload_size):
+            # Records are created while tracing, so their payloads count towards the blocks
+            tracemalloc.start()
+            chain, _ = build_chain(factory, add, mine, chain_class, args.blocks, args.records_per_block, 0)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append({
+                "benchmark": "memory",
+                "ledger": name,
+                "params": {"blocks": args.blocks, "records_per_block": args.records_per_block,
+                           "payload_size": payload_size},
+                "metrics": {
+                    "bytes_per_block": current / args.blocks,
+                    "peak_bytes": peak,
+                },
+            })
+    return results
+
+
+BENCHMARKS = {
+    "mining": bench_mining,
+    "validation": bench_validation,
+    "dag": bench_dag,
+    "ingestion": bench_ingestion,
+    "memory": bench_memory,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ledger scripts.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--blocks", type=int, default=20, help="Blocks mined per mining/memory run")
+    parser.add_argument("--records-per-block", type=int, default=10)
+    parser.add_argument("--difficulties", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--payload-sizes", type=int, nargs="+", default=[64, 4096])
+    parser.add_argument("--chain-lengths", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--validation-payload-size", type=int, default=64)
+    parser.add_argument("--dag-sizes", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument("--dag-parents", type=int, default=3, help="Maximum parents per DAG node")
+    parser.add_argument("--ingestion-transactions", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of each validation timing")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--quick", action="store_true", help="Small sizes for a smoke run")
+    parser.add_argument("--output", help="JSON file for the results (default: stdout)")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.blocks = 3
+        args.difficulties = [1]
+        args.payload_sizes = [64]
+        args.chain_lengths = [20, 40]
+        args.dag_sizes = [50, 100]
+        args.ingestion_transactions = 500
+        args.repeat = 1
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    selected = args.only or list(BENCHMARKS)
+    results = []
+    for name in selected:
+        # Every benchmark gets its own generator so selecting a subset does not change the data
+        rng = random.Random(f"{args.seed}-{name}")
+        print(f"Running {name} benchmark...", file=sys.stderr)
+        results.extend(BENCHMARKS[name](args, rng))
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "arguments": vars(args),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,23 @@
 # using cryptographic hashes.
 #
 ## Key Features:
-#	1.	Transactions: Each transaction stores sender, recipient, and data.
+#	1.	Transactions: Each transaction stores sender, recipient, and data. Large data
+#	    	    can be moved to a ChunkStore (payloadstore.py) and referenced by a PayloadRef.
 #	2.	Blocks: Each block includes a list of transactions, a timestamp, and
-#       	    links to the previous block using a hash.
+#       	    links to the previous block using a hash. The block hash commits to a
+#       	    Merkle root over the transactions, so a single transaction can be proven
+#       	    with Block.merkle_proof(index) and verify_merkle_proof().
 #	3.	Mining: Simple proof-of-work mechanism using a difficulty level.
-#	4.	Validation: Ensures the chain’s integrity by checking hashes.
+#	    	    Blockchain(workers=N) splits the nonce search across N processes.
+#	4.	Validation: Ensures the chain’s integrity by checking hashes. is_chain_valid() checks
+#	    	    every block. validate() opts in to only re-checking blocks above a validated watermark,
+#	    	    validate(full=True, workers=N) shards a full audit across processes, and both report
+#	    	    the first failing height. Blocks are decoded a window at a time, so a chain kept
+#	    	    in a BlockStore is never loaded whole. Mining and validation come from
+#	    	    LedgerEngine/ledger_engine.py, shared with the other single-chain ledgers.
+#	5.	Encoding: Transaction and Block have a versioned binary encoding that new blocks
+#	    	    are hashed over. Blockchain(hash_version=LEGACY_HASH) keeps the string Merkle hash,
+#	    	    and ORIGINAL_HASH the flat string hash of the first version of this file.
 #
 ## How to Run:
 #	1.	Save the code into a Python file, e.g., blockchain.py.
@@ -17,81 +29,558 @@
 #	3.	Add more transactions, adjust the difficulty, or experiment with the mining process.
 
 import hashlib
+import os
+import struct
+import sys
 import time
 
+# Mining and validation are shared with the other ledgers (see LedgerEngine/ledger_engine.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "LedgerEngine"))
+from ledger_engine import (PROOF_OF_WORK, ValidatedChain, ValidationReport,  # noqa: E402,F401
+                           meets_difficulty, mine_nonce)
+
+# Block hashing schemes. ORIGINAL_HASH is the hash of the first version of this file: the
+# str() of every transaction in one flat list, with no Merkle root, so that chains mined
+# before the Merkle tree was added still validate. LEGACY_HASH hashes a Merkle root over the
+# str() of the transactions; BINARY_HASH hashes the binary encoding below.
+ORIGINAL_HASH = 0
+LEGACY_HASH = 1
+BINARY_HASH = 2
+
+# Binary encoding: every value is [u8 tag][u32 length][bytes], and a block is
+# [u8 encoding version][u8 hash version][f64 timestamp][u64 nonce] followed by the
+# previous hash, the block hash, [u32 transaction count] and the length-prefixed transactions.
+ENCODING_VERSION = 1
+LENGTH = struct.Struct("<I")
+TAGGED_LENGTH = struct.Struct("<BI")
+BLOCK_HEADER = struct.Struct("<BBdQ")
+FLOAT = struct.Struct("<d")
+REF_SIZE = struct.Struct("<Q")
+TAG_STR, TAG_BYTES, TAG_REF, TAG_NONE, TAG_INT, TAG_FLOAT = range(6)
+# Containers hold encoded values back to back; a dict holds key, value, key, value, ...
+# Dict entries and set items are sorted by their encoding, so equal values encode the same
+TAG_BOOL, TAG_LIST, TAG_TUPLE, TAG_DICT, TAG_SET = range(7, 12)
+# A PayloadRef to data that was a str, stored as UTF-8
+TAG_TEXT_REF = 12
+
+# Fixed-size block header:
+# [u8 hash version][32 previous hash][f64 timestamp][u64 nonce][32 merkle root][32 block hash]
+HEADER = struct.Struct("<B32sdQ32s32s")
+GENESIS_PREVIOUS_HASH = "0"
+
+
+def encode_value(value, out):
+    if isinstance(value, str):
+        tag, body = TAG_STR, value.encode()
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        tag, body = TAG_BYTES, bytes(value)
+    elif isinstance(value, PayloadRef):
+        tag, body = TAG_TEXT_REF if value.text else TAG_REF, bytes.fromhex(value.root) + REF_SIZE.pack(value.size)
+    elif value is None:
+        tag, body = TAG_NONE, b""
+    elif isinstance(value, int) and not isinstance(value, bool):
+        tag, body = TAG_INT, str(value).encode()
+    elif isinstance(value, float):
+        tag, body = TAG_FLOAT, FLOAT.pack(value)
+    elif isinstance(value, bool):
+        tag, body = TAG_BOOL, b"\x01" if value else b"\x00"
+    elif isinstance(value, (list, tuple)):
+        tag, body = TAG_LIST if isinstance(value, list) else TAG_TUPLE, encode_values(value)
+    elif isinstance(value, dict):
+        tag, body = TAG_DICT, b"".join(sorted(encode_values(entry) for entry in value.items()))
+    elif isinstance(value, set):
+        tag, body = TAG_SET, b"".join(sorted(encode_values((item,)) for item in value))
+    else:
+        raise TypeError(f"Cannot encode values of type {type(value).__name__}")
+    out += TAGGED_LENGTH.pack(tag, len(body))
+    out += body
+
+
+def encode_values(values):
+    out = bytearray()
+    for value in values:
+        encode_value(value, out)
+    return bytes(out)
+
+
+def decode_values(body):
+    values = []
+    offset = 0
+    while offset < len(body):
+        value, offset = decode_value(body, offset)
+        values.append(value)
+    return values
+
+
+# Returns (value, offset just past it)
+def decode_value(data, offset):
+    tag, length = TAGGED_LENGTH.unpack_from(data, offset)
+    start = offset + TAGGED_LENGTH.size
+    end = start + length
+    if end > len(data):
+        raise ValueError("Truncated value in binary encoding")
+    body = bytes(data[start:end])
+    if tag == TAG_STR:
+        return body.decode(), end
+    if tag == TAG_BYTES:
+        return body, end
+    if tag in (TAG_REF, TAG_TEXT_REF):
+        return PayloadRef(body[:32].hex(), REF_SIZE.unpack_from(body, 32)[0], tag == TAG_TEXT_REF), end
+    if tag == TAG_NONE:
+        return None, end
+    if tag == TAG_INT:
+        return int(body), end
+    if tag == TAG_FLOAT:
+        return FLOAT.unpack(body)[0], end
+    if tag == TAG_BOOL:
+        return body == b"\x01", end
+    if tag == TAG_LIST:
+        return decode_values(body), end
+    if tag == TAG_TUPLE:
+        return tuple(decode_values(body)), end
+    if tag == TAG_DICT:
+        items = decode_values(body)
+        return dict(zip(items[::2], items[1::2])), end
+    if tag == TAG_SET:
+        return set(decode_values(body)), end
+    raise ValueError(f"Unknown value tag {tag}")
+
+
 class Transaction:
+    __slots__ = ("sender", "recipient", "data")
+
     def __init__(self, sender, recipient, data):
         self.sender = sender
         self.recipient = recipient
         self.data = data
 
+    # Pickles of the original Transaction carry a __dict__ rather than slots
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = state[1]
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    # Bytes committed to by the block's Merkle tree under ORIGINAL_HASH and LEGACY_HASH
+    def serialize(self):
+        return str(self).encode()
+
+    def encode(self):
+        out = bytearray([ENCODING_VERSION])
+        encode_value(self.sender, out)
+        encode_value(self.recipient, out)
+        encode_value(self.data, out)
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data):
+        if data[0] != ENCODING_VERSION:
+            raise ValueError(f"Unsupported transaction encoding version {data[0]}")
+        sender, offset = decode_value(data, 1)
+        recipient, offset = decode_value(data, offset)
+        value, offset = decode_value(data, offset)
+        return cls(sender, recipient, value)
+
+    # Leaf bytes for the given block hash version
+    def leaf(self, hash_version):
+        return MerkleTree.hash_leaf(self.serialize() if hash_version != BINARY_HASH else self.encode())
+
     def __repr__(self):
         return f"Transaction(sender={self.sender}, recipient={self.recipient}, data={self.data})"
 
+
+# Stands in for a large Transaction.data that was moved to a ChunkStore (see payloadstore.py).
+# Blocks commit only to the payload's Merkle root, its size in bytes, and whether it was a str.
+class PayloadRef:
+    __slots__ = ("root", "size", "text")
+
+    def __init__(self, root, size, text=False):
+        self.root = root
+        self.size = size
+        self.text = text  # The payload was a str and is read back decoded from UTF-8
+
+    # Refs pickled before `text` was added are bytes payloads
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = state[1]
+        self.text = False
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        return (isinstance(other, PayloadRef) and
+                (self.root, self.size, self.text) == (other.root, other.size, other.text))
+
+    def __hash__(self):
+        return hash((self.root, self.size, self.text))
+
+    # A bytes ref keeps the repr it had before `text` was added, so string block hashes do not change
+    def __repr__(self):
+        text = ", text=True" if self.text else ""
+        return f"PayloadRef(root={self.root}, size={self.size}{text})"
+
+
+# Merkle tree over transaction hashes. Leaves and inner nodes are hashed with different
+# prefixes, and a node without a sibling is promoted to the next level unchanged,
+# so appending a leaf only rehashes the path from that leaf to the root.
+class MerkleTree:
+    __slots__ = ("levels",)
+    EMPTY_ROOT = hashlib.sha256(b"").hexdigest()
+
+    def __init__(self, leaves=()):
+        # levels[0] holds the leaf digests, levels[-1] the root
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            nodes = self.levels[-1]
+            self.levels.append([self.parent(nodes, i) for i in range(0, len(nodes), 2)])
+
+    @staticmethod
+    def hash_leaf(data):
+        return hashlib.sha256(b"\x00" + data).digest()
+
+    @staticmethod
+    def hash_node(left, right):
+        return hashlib.sha256(b"\x01" + left + right).digest()
+
+    @classmethod
+    def parent(cls, nodes, left_index):
+        if left_index + 1 < len(nodes):
+            return cls.hash_node(nodes[left_index], nodes[left_index + 1])
+        return nodes[left_index]
+
+    def append(self, leaf):
+        self.levels[0].append(leaf)
+        index = len(self.levels[0]) - 1
+        level = 0
+        while len(self.levels[level]) > 1:
+            parent_index = index // 2
+            parent = self.parent(self.levels[level], parent_index * 2)
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            upper = self.levels[level + 1]
+            if parent_index < len(upper):
+                upper[parent_index] = parent
+            else:
+                upper.append(parent)
+            index = parent_index
+            level += 1
+
+    def root(self):
+        top = self.levels[-1]
+        return top[0].hex() if top else self.EMPTY_ROOT
+
+    # Sibling hashes from the leaf at `index` up to the root, as (hex digest, sibling_is_left)
+    def proof(self, index):
+        if not 0 <= index < len(self.levels[0]):
+            raise IndexError(f"No leaf at index {index}")
+        path = []
+        for nodes in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(nodes):
+                path.append((nodes[sibling].hex(), sibling < index))
+            index //= 2
+        return path
+
+    def __len__(self):
+        return len(self.levels[0])
+
+
+def verify_merkle_proof(transaction, proof, merkle_root, hash_version=BINARY_HASH):
+    node = transaction.leaf(hash_version)
+    for sibling_hex, sibling_is_left in proof:
+        sibling = bytes.fromhex(sibling_hex)
+        node = MerkleTree.hash_node(sibling, node) if sibling_is_left else MerkleTree.hash_node(node, sibling)
+    return node.hex() == merkle_root
+
+
+# Everything that is hashed for a block except the nonce, which is appended as decimal digits
+def block_hash_prefix(previous_hash, timestamp, merkle_root, hash_version):
+    if hash_version == LEGACY_HASH:
+        return (
+            str(previous_hash) +
+            str(timestamp) +
+            merkle_root
+        ).encode()
+    out = bytearray([BINARY_HASH])
+    encode_value(previous_hash, out)
+    out += FLOAT.pack(timestamp)
+    out += bytes.fromhex(merkle_root)
+    return bytes(out)
+
+
+class BlockHeader:
+    __slots__ = ("previous_hash", "timestamp", "merkle_root", "nonce", "hash_version", "hash")
+
+    def __init__(self, previous_hash, timestamp, merkle_root, nonce, hash_version, block_hash):
+        self.previous_hash = previous_hash
+        self.timestamp = timestamp
+        self.merkle_root = merkle_root
+        self.nonce = nonce
+        self.hash_version = hash_version
+        self.hash = block_hash
+
+    # None under ORIGINAL_HASH: the hash covers the transactions rather than the Merkle root,
+    # so such a header cannot be checked on its own
+    def calculate_hash(self):
+        if self.hash_version == ORIGINAL_HASH:
+            return None
+        prefix = block_hash_prefix(self.previous_hash, self.timestamp, self.merkle_root, self.hash_version)
+        return hashlib.sha256(prefix + str(self.nonce).encode()).hexdigest()
+
+    def encode(self):
+        previous = bytes(32) if self.previous_hash == GENESIS_PREVIOUS_HASH else bytes.fromhex(self.previous_hash)
+        return HEADER.pack(self.hash_version, previous, self.timestamp, self.nonce,
+                           bytes.fromhex(self.merkle_root), bytes.fromhex(self.hash))
+
+    @classmethod
+    def decode(cls, data, offset=0):
+        hash_version, previous, timestamp, nonce, merkle_root, block_hash = HEADER.unpack_from(data, offset)
+        previous_hash = GENESIS_PREVIOUS_HASH if previous == bytes(32) else previous.hex()
+        return cls(previous_hash, timestamp, merkle_root.hex(), nonce, hash_version, block_hash.hex())
+
+    def __repr__(self):
+        return (f"BlockHeader(hash={self.hash}, previous_hash={self.previous_hash}, "
+                f"timestamp={self.timestamp}, nonce={self.nonce}, merkle_root={self.merkle_root})")
+
+
 class Block:
-    def __init__(self, previous_hash, transactions, timestamp=None):
+    __slots__ = ("previous_hash", "transactions", "merkle_tree", "timestamp", "nonce", "hash", "hash_version")
+
+    def __init__(self, previous_hash, transactions, timestamp=None, hash_version=BINARY_HASH,
+                 nonce=0, block_hash=None):
         self.previous_hash = previous_hash
         self.transactions = transactions
+        self.hash_version = hash_version
+        self.merkle_tree = MerkleTree([tx.leaf(hash_version) for tx in transactions])
         self.timestamp = timestamp or time.time()
-        self.nonce = 0
+        self.nonce = nonce
+        # A decoded block keeps its stored hash; is_chain_valid() checks it against the content
+        self.hash = block_hash if block_hash is not None else self.calculate_hash()
+
+    # Blocks pickled by the original version of this file carry a __dict__ without a hash
+    # version or Merkle tree; they are ORIGINAL_HASH blocks
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = state[1]
+        else:
+            state = dict(state, hash_version=ORIGINAL_HASH)
+        for name, value in state.items():
+            setattr(self, name, value)
+        if "merkle_tree" not in state:
+            self.merkle_tree = MerkleTree([tx.leaf(self.hash_version) for tx in self.transactions])
+
+    @property
+    def merkle_root(self):
+        return self.merkle_tree.root()
+
+    # Adds a transaction to a block that has not been mined yet
+    def add_transaction(self, transaction):
+        self.transactions.append(transaction)
+        self.merkle_tree.append(transaction.leaf(self.hash_version))
         self.hash = self.calculate_hash()
 
+    # Inclusion proof for one transaction, checked with
+    # verify_merkle_proof(tx, proof, block.merkle_root, block.hash_version)
+    def merkle_proof(self, index):
+        return self.merkle_tree.proof(index)
+
+    # Recomputes the Merkle root from the transactions themselves, bypassing the cached leaves
+    def has_valid_merkle_root(self):
+        leaves = [tx.leaf(self.hash_version) for tx in self.transactions]
+        return MerkleTree(leaves).root() == self.merkle_root
+
+    def hash_prefix(self):
+        if self.hash_version == ORIGINAL_HASH:
+            return (
+                str(self.previous_hash) +
+                str(self.timestamp) +
+                str([str(tx) for tx in self.transactions])
+            ).encode()
+        return block_hash_prefix(self.previous_hash, self.timestamp, self.merkle_root, self.hash_version)
+
+    # The fixed-size part of the block, enough to check its hash and link without the transactions
+    def header(self):
+        return BlockHeader(self.previous_hash, self.timestamp, self.merkle_root, self.nonce,
+                           self.hash_version, self.hash)
+
     def calculate_hash(self):
-        block_content = (
-            str(self.previous_hash) +
-            str(self.timestamp) +
-            str([str(tx) for tx in self.transactions]) +
-            str(self.nonce)
-        )
-        return hashlib.sha256(block_content.encode()).hexdigest()
-
-    def mine_block(self, difficulty):
-        target = '0' * difficulty
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        return hashlib.sha256(self.hash_prefix() + str(self.nonce).encode()).hexdigest()
+
+    def mine_block(self, difficulty, workers=1):
+        self.nonce, self.hash = mine_nonce(self.hash_prefix(), difficulty, self.nonce, workers)
+
+    # Checks the Merkle root, the hash and the proof-of-work; returns the reason the block is invalid, or None.
+    # keyring and sealing are part of the shared check interface; these blocks are only ever mined.
+    def check(self, difficulty, keyring=None, sealing=PROOF_OF_WORK):
+        if not self.has_valid_merkle_root():
+            return "Merkle root does not match the transactions"
+        if self.hash != self.calculate_hash():
+            return "Block hash does not match its content"
+        if not meets_difficulty(bytes.fromhex(self.hash), difficulty):
+            return "Block hash does not meet the difficulty"
+        return None
+
+    def encode(self):
+        out = bytearray(BLOCK_HEADER.pack(ENCODING_VERSION, self.hash_version, self.timestamp, self.nonce))
+        encode_value(self.previous_hash, out)
+        encode_value(self.hash, out)
+        out += LENGTH.pack(len(self.transactions))
+        for tx in self.transactions:
+            encoded = tx.encode()
+            out += LENGTH.pack(len(encoded))
+            out += encoded
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data):
+        version, hash_version, timestamp, nonce = BLOCK_HEADER.unpack_from(data, 0)
+        if version != ENCODING_VERSION:
+            raise ValueError(f"Unsupported block encoding version {version}")
+        previous_hash, offset = decode_value(data, BLOCK_HEADER.size)
+        block_hash, offset = decode_value(data, offset)
+        (count,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        transactions = []
+        for _ in range(count):
+            (length,) = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            transactions.append(Transaction.decode(data[offset:offset + length]))
+            offset += length
+        return cls(previous_hash, transactions, timestamp, hash_version, nonce, block_hash)
 
     def __repr__(self):
         return f"Block(hash={self.hash}, transactions={self.transactions})"
 
-class Blockchain:
-    def __init__(self, difficulty=2):
-        self.chain = [self.create_genesis_block()]
+
+# Bulk encoding of a list of blocks: [u32 count] then each block as [u32 length][block]
+def encode_blocks(blocks):
+    out = bytearray(LENGTH.pack(len(blocks)))
+    for block in blocks:
+        encoded = block.encode()
+        out += LENGTH.pack(len(encoded))
+        out += encoded
+    return bytes(out)
+
+
+def decode_blocks(data):
+    view = memoryview(data)
+    (count,) = LENGTH.unpack_from(view, 0)
+    offset = LENGTH.size
+    blocks = []
+    for _ in range(count):
+        (length,) = LENGTH.unpack_from(view, offset)
+        offset += LENGTH.size
+        blocks.append(Block.decode(view[offset:offset + length]))
+        offset += length
+    return blocks
+
+
+class Blockchain(ValidatedChain):
+    def __init__(self, difficulty=2, workers=1, store=None, payload_store=None, watermark_path=None,
+                 index=None, hash_version=BINARY_HASH):
+        # New blocks are hashed over the binary encoding; LEGACY_HASH and ORIGINAL_HASH keep the string hashes
+        self.hash_version = hash_version
+        # A BlockStore (see blockstore.py) keeps the chain on disk; otherwise it lives in a list
+        self.chain = store if store is not None else []
+        if len(self.chain) == 0:
+            self.chain.append(self.create_genesis_block())
         self.difficulty = difficulty
+        self.workers = workers  # Processes used to mine each block
+        # (height, hash) of the last block known to be valid, persisted to watermark_path if given
+        self.watermark_path = watermark_path
+        self.watermark = self.load_watermark()
+        # A ChunkStore (see payloadstore.py) takes over large transaction data
+        self.payload_store = payload_store
+        # A TransactionIndex (see txindex.py) answers lookups by hash, sender and recipient
+        self.index = index
+        if index is not None:
+            index.catch_up(self.chain)
         self.pending_transactions = []
 
+    # A Blockchain pickled by the original version of this file only has chain, difficulty
+    # and pending_transactions, and its blocks are ORIGINAL_HASH blocks
+    def __setstate__(self, state):
+        self.__dict__.update(hash_version=ORIGINAL_HASH, workers=1, watermark_path=None, watermark=None,
+                             payload_store=None, index=None)
+        self.__dict__.update(state)
+
     def create_genesis_block(self):
-        return Block("0", [], time.time())
+        return Block(GENESIS_PREVIOUS_HASH, [], time.time(), self.hash_version)
 
     def get_latest_block(self):
         return self.chain[-1]
 
+    # Headers of the blocks from height `start` up to, not including, `stop`
+    def get_headers(self, start=0, stop=None):
+        stop = len(self.chain) if stop is None else min(stop, len(self.chain))
+        return [self.chain[height].header() for height in range(start, stop)]
+
     def add_transaction(self, transaction):
+        self.pending_transactions.append(self.prepare_transaction(transaction))
+
+    # Checks a transaction and moves large data to the payload store, if there is one
+    def prepare_transaction(self, transaction):
         if not isinstance(transaction, Transaction):
             raise ValueError("Invalid transaction format")
-        self.pending_transactions.append(transaction)
+        if self.payload_store is not None:
+            data = self.payload_store.offload(transaction.data)
+            # The caller's transaction keeps its data; the chain records a copy holding the ref
+            if data is not transaction.data:
+                transaction = Transaction(transaction.sender, transaction.recipient, data)
+        # Rejected here rather than when the block is built, which would fail the whole batch
+        try:
+            transaction.encode()
+        except TypeError as error:
+            raise ValueError(f"Invalid transaction data: {error}") from error
+        return transaction
 
     def mine_pending_transactions(self, miner_address):
+        transactions, self.pending_transactions = self.pending_transactions, []
+        height = len(self.chain)
+        try:
+            return self.mine_transactions(transactions, miner_address)
+        except Exception:
+            # No block was appended, so the transactions are pending again, ahead of newer ones
+            if len(self.chain) == height:
+                self.pending_transactions[:0] = transactions
+            raise
+
+    # Mines a block holding the given transactions plus the miner's reward; `transactions` is not modified
+    def mine_transactions(self, transactions, miner_address):
         # Reward for mining
-        self.pending_transactions.append(Transaction("System", miner_address, "Mining Reward"))
+        transactions = list(transactions) + [Transaction("System", miner_address, "Mining Reward")]
 
-        new_block = Block(self.get_latest_block().hash, self.pending_transactions)
-        new_block.mine_block(self.difficulty)
+        new_block = Block(self.get_latest_block().hash, transactions, hash_version=self.hash_version)
+        new_block.mine_block(self.difficulty, self.workers)
 
-        self.chain.append(new_block)
-        self.pending_transactions = []
+        self.append_block(new_block)
+        return new_block
 
-    def is_chain_valid(self):
-        for i in range(1, len(self.chain)):
-            current = self.chain[i]
-            previous = self.chain[i - 1]
+    # Appends a sealed block and keeps the index in step with the chain
+    def append_block(self, block):
+        self.chain.append(block)
+        if self.index is not None:
+            self.index.add_block(len(self.chain) - 1, block)
 
-            if current.hash != current.calculate_hash():
-                return False
-            if current.previous_hash != previous.hash:
-                return False
+    def get_block_by_hash(self, block_hash):
+        if self.index is not None:
+            height = self.index.height_of(block_hash)
+            return None if height is None else self.chain[height]
+        return next((block for block in self.chain if block.hash == block_hash), None)
 
-        return True
+    # Lazily yields the transactions matching the given sender and/or recipient, in chain order
+    def find_transactions(self, sender=None, recipient=None):
+        if self.index is None:
+            for block in self.chain:
+                for tx in block.transactions:
+                    if (sender is None or tx.sender == sender) and (recipient is None or tx.recipient == recipient):
+                        yield tx
+            return
+        block, block_height = None, None
+        for height, position in self.index.postings(sender, recipient):
+            if height != block_height:
+                block, block_height = self.chain[height], height
+            yield block.transactions[position]
 
     def __repr__(self):
         return f"Blockchain(chain={self.chain})"
@@ -0,0 +1,318 @@
+## Persistent, append-only storage for the blocks of blockchain.py.
+#
+## Layout of a store directory:
+#	1.	Segment files (segment-00000.dat, ...): sealed blocks appended one after another,
+#	    	    each record framed as [length][crc32][payload], where the payload is the
+#	    	    binary block encoding (Block.encode). A new segment is started once the
+#	    	    current one reaches max_segment_size.
+#	2.	Index file (index.dat): one fixed-size entry per block height holding the
+#	    	    segment number, offset, record length and block hash.
+#
+## Behaviour:
+#	1.	Opening a store reads only the index; blocks are decoded lazily from
+#	    	    memory-mapped segments when asked for by height or hash.
+#	2.	Appends are buffered and fsync'ed every sync_every blocks (and on sync/close).
+#	3.	A torn tail write (crash in the middle of an append) is detected on open
+#	    	    and the incomplete block is dropped.
+#	4.	view() returns a read-only, picklable BlockStoreView of the blocks stored so far,
+#	    	    which validation worker processes read their height ranges from.
+#
+## How to Use:
+#	store = BlockStore("ledger")
+#	chain = Blockchain(difficulty=3, store=store)
+#	...
+#	store.close()
+
+import mmap
+import os
+import struct
+import zlib
+
+from blockchain import Block
+
+RECORD_HEADER = struct.Struct("<II")  # payload length, crc32 of payload
+INDEX_ENTRY = struct.Struct("<IQI32s")  # segment number, offset, record length, block hash
+
+
+def encode_block(block):
+    return block.encode()
+
+
+def decode_block(payload):
+    return Block.decode(payload)
+
+
+class SegmentReader:
+    """
+    Reads block records from the memory-mapped segment files of a store directory.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.maps = {}  # segment number -> mmap of a sealed (or grown) segment
+
+    def index_path(self):
+        return os.path.join(self.directory, "index.dat")
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:05d}.dat")
+
+    def read_record(self, segment, offset, length):
+        mapped = self.maps.get(segment)
+        if mapped is None or len(mapped) < offset + length:
+            if mapped is not None:
+                mapped.close()
+            with open(self.segment_path(segment), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[segment] = mapped
+        return mapped[offset + RECORD_HEADER.size:offset + length]
+
+    def close(self):
+        for mapped in self.maps.values():
+            mapped.close()
+        self.maps = {}
+
+
+class BlockStore(SegmentReader):
+    def __init__(self, directory, sync_every=64, max_segment_size=64 * 1024 * 1024):
+        """
+        Opens (or creates) a block store.
+        :param directory: Directory holding the segment and index files.
+        :param sync_every: Number of appended blocks between two fsyncs.
+        :param max_segment_size: Size in bytes after which a new segment file is started.
+        """
+        super().__init__(directory)
+        self.sync_every = sync_every
+        self.max_segment_size = max_segment_size
+        os.makedirs(directory, exist_ok=True)
+
+        self.entries = []  # (segment, offset, length, hash) per height
+        self.heights = {}  # block hash -> height
+        self.unsynced = 0
+        self.tip = None
+
+        self.recover()
+        self.index_file = open(self.index_path(), "ab")
+        if self.entries:
+            segment, offset, length, _ = self.entries[-1]
+            self.segment = segment
+            self.segment_size = offset + length
+        else:
+            self.segment = 0
+            self.segment_size = 0
+        self.segment_file = open(self.segment_path(self.segment), "ab")
+
+    def recover(self):
+        """
+        Loads the index and drops any trailing block that was not completely written.
+        """
+        if not os.path.exists(self.index_path()):
+            return
+        with open(self.index_path(), "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        entries = [INDEX_ENTRY.unpack_from(data, pos) for pos in range(0, usable, INDEX_ENTRY.size)]
+
+        # Walk back from the tail until an entry points at a complete, intact record
+        while entries and not self.record_is_intact(*entries[-1][:3]):
+            entries.pop()
+
+        if len(entries) * INDEX_ENTRY.size != len(data):
+            with open(self.index_path(), "r+b") as f:
+                f.truncate(len(entries) * INDEX_ENTRY.size)
+
+        # Records written after the last indexed one belong to a torn append
+        last_segment, end = 0, 0
+        if entries:
+            segment, offset, length, _ = entries[-1]
+            last_segment, end = segment, offset + length
+        segment = last_segment
+        while os.path.exists(self.segment_path(segment)):
+            path = self.segment_path(segment)
+            if segment > last_segment:
+                os.remove(path)
+            elif os.path.getsize(path) > end:
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+            segment += 1
+
+        for height, (segment, offset, length, block_hash) in enumerate(entries):
+            self.entries.append((segment, offset, length, block_hash))
+            self.heights[block_hash.hex()] = height
+
+    def record_is_intact(self, segment, offset, length):
+        path = self.segment_path(segment)
+        if not os.path.exists(path) or os.path.getsize(path) < offset + length:
+            return False
+        with open(path, "rb") as f:
+            f.seek(offset)
+            record = f.read(length)
+        payload_length, crc = RECORD_HEADER.unpack_from(record)
+        payload = record[RECORD_HEADER.size:]
+        return payload_length == len(payload) and zlib.crc32(payload) == crc
+
+    def append(self, block):
+        """
+        Appends a sealed block at the next height.
+        :param block: Block whose previous_hash links to the current tip.
+        """
+        payload = encode_block(block)
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        if self.segment_size and self.segment_size + len(record) > self.max_segment_size:
+            self.sync()
+            self.segment_file.close()
+            self.segment += 1
+            self.segment_size = 0
+            self.segment_file = open(self.segment_path(self.segment), "ab")
+
+        entry = (self.segment, self.segment_size, len(record), bytes.fromhex(block.hash))
+        self.segment_file.write(record)
+        self.index_file.write(INDEX_ENTRY.pack(*entry))
+        self.segment_size += len(record)
+
+        self.heights[block.hash] = len(self.entries)
+        self.entries.append(entry)
+        self.tip = block
+
+        self.unsynced += 1
+        if self.unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """
+        Flushes buffered appends and fsyncs segment data before the index that points at it.
+        """
+        self.segment_file.flush()
+        os.fsync(self.segment_file.fileno())
+        self.index_file.flush()
+        os.fsync(self.index_file.fileno())
+        self.unsynced = 0
+
+    def read_record(self, segment, offset, length):
+        if segment == self.segment:
+            self.segment_file.flush()
+        return super().read_record(segment, offset, length)
+
+    def get(self, height):
+        """
+        Loads the block at the given height (negative heights count from the tip).
+        """
+        if height < 0:
+            height += len(self.entries)
+        if not 0 <= height < len(self.entries):
+            raise IndexError(f"No block at height {height}")
+        if height == len(self.entries) - 1 and self.tip is not None:
+            return self.tip
+        block = decode_block(self.read_record(*self.entries[height][:3]))
+        if height == len(self.entries) - 1:
+            self.tip = block
+        return block
+
+    def get_by_hash(self, block_hash):
+        """
+        Loads the block with the given hash, or returns None if it is not stored.
+        """
+        height = self.heights.get(block_hash)
+        return None if height is None else self.get(height)
+
+    def height_of(self, block_hash):
+        return self.heights.get(block_hash)
+
+    # Sequence protocol, so a BlockStore can stand in for Blockchain.chain
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.get(height) for height in range(*item.indices(len(self.entries)))]
+        return self.get(item)
+
+    def __iter__(self):
+        for height in range(len(self.entries)):
+            yield self.get(height)
+
+    def view(self):
+        """
+        Returns a read-only view of the blocks stored so far, for other processes to read.
+        """
+        # Buffered appends must reach the files the view reads
+        self.segment_file.flush()
+        self.index_file.flush()
+        return BlockStoreView(self.directory, len(self.entries))
+
+    def close(self):
+        self.sync()
+        self.segment_file.close()
+        self.index_file.close()
+        super().close()
+
+    def __repr__(self):
+        return f"BlockStore(directory={self.directory}, blocks={len(self.entries)})"
+
+
+class BlockStoreView(SegmentReader):
+    def __init__(self, directory, length):
+        """
+        Read-only view of the first `length` blocks of a store. Only the directory and length are
+        pickled; the index entries of the blocks asked for are read from index.dat on demand.
+        """
+        super().__init__(directory)
+        self.length = length
+
+    def __getstate__(self):
+        return self.directory, self.length
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def entries(self, start, stop):
+        with open(self.index_path(), "rb") as f:
+            f.seek(start * INDEX_ENTRY.size)
+            data = f.read((stop - start) * INDEX_ENTRY.size)
+        return INDEX_ENTRY.iter_unpack(data)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.length)
+            if step != 1:
+                return [self[height] for height in range(start, stop, step)]
+            if start >= stop:
+                return []
+            return [decode_block(self.read_record(*entry[:3])) for entry in self.entries(start, stop)]
+        height = item + self.length if item < 0 else item
+        if not 0 <= height < self.length:
+            raise IndexError(f"No block at height {item}")
+        (entry,) = self.entries(height, height + 1)
+        return decode_block(self.read_record(*entry[:3]))
+
+    def __repr__(self):
+        return f"BlockStoreView(directory={self.directory}, blocks={self.length})"
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    from blockchain import Blockchain, Transaction
+
+    directory = tempfile.mkdtemp()
+
+    # Build a chain on disk
+    store = BlockStore(directory, sync_every=8)
+    my_blockchain = Blockchain(difficulty=3, store=store)
+    my_blockchain.add_transaction(Transaction("Alice", "Bob", "Data block 1"))
+    my_blockchain.mine_pending_transactions("Miner1")
+    my_blockchain.add_transaction(Transaction("Bob", "Charlie", "Data block 2"))
+    my_blockchain.mine_pending_transactions("Miner2")
+    store.close()
+
+    # Reopen it: only the index is read until blocks are requested
+    store = BlockStore(directory)
+    reopened = Blockchain(difficulty=3, store=store)
+    print(f"Blocks on disk: {len(reopened.chain)}")
+    print(f"Is Blockchain Valid? {reopened.is_chain_valid()}")
+    print(f"Tip: {reopened.get_latest_block()}")
+    store.close()
@@ -0,0 +1,150 @@
+## Light client for the chain of blockchain.py.
+#
+## How it works:
+#	1.	The client follows the chain through fixed-size block headers only
+#	    	    (previous hash, timestamp, nonce, Merkle root and block hash).
+#	2.	Each new header is checked for its hash, its proof-of-work and its link to the
+#	    	    current tip, so linkage is validated without holding any transactions.
+#	3.	Headers are kept packed in one bytearray (BlockHeader.encode), which is a few MB
+#	    	    even for millions of blocks.
+#	4.	Block bodies (the transactions) are fetched from a body source only when a block
+#	    	    is asked for, checked against the header's Merkle root, and kept in a small LRU cache.
+#	5.	A single transaction can also be checked with a Merkle proof, without its body.
+
+import collections
+
+from blockchain import (HEADER, Block, BlockHeader, MerkleTree, meets_difficulty,
+                        verify_merkle_proof)
+
+
+class LightClient:
+    def __init__(self, genesis_header, difficulty, body_source=None, cache_size=16):
+        """
+        Creates a light client that trusts the given genesis header.
+        :param genesis_header: BlockHeader of the chain's genesis block.
+        :param difficulty: Proof-of-work difficulty every later header must meet.
+        :param body_source: Callable returning the transactions of the block at a height.
+        :param cache_size: Number of fetched bodies kept in memory.
+        """
+        self.difficulty = difficulty
+        self.body_source = body_source
+        self.cache_size = cache_size
+        self.headers = bytearray(genesis_header.encode())
+        self.tip = genesis_header
+        self.bodies = collections.OrderedDict()  # height -> transactions, least recently used first
+
+    @classmethod
+    def from_chain(cls, blockchain, cache_size=16):
+        """
+        Follows a local Blockchain: headers are synced now, bodies are read from it on demand.
+        """
+        client = cls(blockchain.chain[0].header(), blockchain.difficulty,
+                     lambda height: blockchain.chain[height].transactions, cache_size)
+        client.sync(blockchain.get_headers(1))
+        return client
+
+    def __len__(self):
+        return len(self.headers) // HEADER.size
+
+    def add_header(self, header):
+        """
+        Validates a header against the tip and appends it. Raises ValueError if it does not fit.
+        """
+        if header.hash != header.calculate_hash():
+            raise ValueError(f"Header {header.hash} does not match its content")
+        if header.previous_hash != self.tip.hash:
+            raise ValueError(f"Header {header.hash} does not link to the tip {self.tip.hash}")
+        if not meets_difficulty(bytes.fromhex(header.hash), self.difficulty):
+            raise ValueError(f"Header {header.hash} does not meet difficulty {self.difficulty}")
+        self.headers += header.encode()
+        self.tip = header
+
+    def sync(self, headers):
+        """
+        Appends a run of headers following the tip. Returns the new chain length.
+        """
+        for header in headers:
+            self.add_header(header)
+        return len(self)
+
+    def header(self, height):
+        if height < 0:
+            height += len(self)
+        if not 0 <= height < len(self):
+            raise IndexError(f"No header at height {height}")
+        return BlockHeader.decode(self.headers, height * HEADER.size)
+
+    def height_of(self, block_hash):
+        """
+        Returns the height of the block with the given hash, or None.
+        """
+        target = bytes.fromhex(block_hash)
+        # The block hash is the last field of each packed header
+        field_offset = HEADER.size - len(target)
+        position = self.headers.find(target)
+        while position != -1:
+            if position % HEADER.size == field_offset:
+                return position // HEADER.size
+            position = self.headers.find(target, position + 1)
+        return None
+
+    def get_transactions(self, height):
+        """
+        Fetches the body of a block and checks it against the header's Merkle root.
+        """
+        if height < 0:
+            height += len(self)
+        if height in self.bodies:
+            self.bodies.move_to_end(height)
+            return self.bodies[height]
+        if self.body_source is None:
+            raise ValueError("This light client has no body source")
+
+        header = self.header(height)
+        transactions = self.body_source(height)
+        leaves = [tx.leaf(header.hash_version) for tx in transactions]
+        if MerkleTree(leaves).root() != header.merkle_root:
+            raise ValueError(f"Body of block {header.hash} does not match its Merkle root")
+
+        self.bodies[height] = transactions
+        if len(self.bodies) > self.cache_size:
+            self.bodies.popitem(last=False)
+        return transactions
+
+    def get_block(self, height):
+        """
+        Returns the full block at a height, fetching its body if needed.
+        """
+        header = self.header(height)
+        return Block(header.previous_hash, list(self.get_transactions(height)), header.timestamp,
+                     header.hash_version, header.nonce, header.hash)
+
+    def verify_transaction(self, height, transaction, proof):
+        """
+        Checks a Merkle inclusion proof for a transaction without fetching the block's body.
+        """
+        header = self.header(height)
+        return verify_merkle_proof(transaction, proof, header.merkle_root, header.hash_version)
+
+    def __repr__(self):
+        return f"LightClient(headers={len(self)}, tip={self.tip.hash})"
+
+
+# Example usage
+if __name__ == "__main__":
+    from blockchain import Blockchain, Transaction
+
+    my_blockchain = Blockchain(difficulty=3)
+    my_blockchain.add_transaction(Transaction("Alice", "Bob", "Data block 1"))
+    my_blockchain.mine_pending_transactions("Miner1")
+    my_blockchain.add_transaction(Transaction("Bob", "Charlie", "Data block 2"))
+    my_blockchain.mine_pending_transactions("Miner2")
+
+    client = LightClient.from_chain(my_blockchain)
+    print(client)
+    print(f"Header bytes held: {len(client.headers)}")
+
+    block = my_blockchain.chain[2]
+    proof = block.merkle_proof(0)
+    print(f"Transaction proven from headers: {client.verify_transaction(2, block.transactions[0], proof)}")
+    print(f"Fetched block: {client.get_block(2)}")
@@ -0,0 +1,227 @@
+## Bounded mempool that seals blocks for blockchain.py on its own.
+#
+## Behaviour:
+#	1.	Transactions wait in a queue of at most max_size entries. add() raises MempoolFull
+#	    	    when the queue is full; the asyncio add_transaction() waits for room instead.
+#	2.	A block is sealed as soon as the queue holds max_transactions transactions,
+#	    	    max_bytes of encoded transactions, or its oldest transaction is max_age seconds old.
+#	3.	With start(), a sealer task runs on the event loop and mines each block in an
+#	    	    executor, so producers awaiting add_transaction() never wait behind proof-of-work.
+#	4.	Without an event loop, call seal_due() / flush() to seal blocks synchronously.
+#	5.	A batch that fails to seal (e.g. an OSError from the block store) goes back to the
+#	    	    head of the queue. The sealer task records the error in last_error and retries
+#	    	    after max_age; seal_due() / flush() re-raise it. close() raises it if the
+#	    	    remaining transactions cannot be sealed.
+
+import asyncio
+import collections
+import time
+
+
+class MempoolFull(Exception):
+    pass
+
+
+class Mempool:
+    def __init__(self, blockchain, miner_address, max_size=10000, max_transactions=1000,
+                 max_bytes=1024 * 1024, max_age=2.0, executor=None):
+        """
+        Creates a mempool feeding a blockchain.
+        :param blockchain: Blockchain that sealed blocks are appended to.
+        :param miner_address: Address rewarded for every sealed block.
+        :param max_size: Maximum number of queued transactions.
+        :param max_transactions: Seal a block once this many transactions are queued.
+        :param max_bytes: Seal a block once the queued transactions encode to this many bytes.
+        :param max_age: Seal a block once the oldest queued transaction is this many seconds old.
+        :param executor: concurrent.futures executor used for mining (None uses the loop's default).
+        """
+        if max_transactions > max_size:
+            raise ValueError("max_transactions cannot exceed max_size")
+        self.blockchain = blockchain
+        self.miner_address = miner_address
+        self.max_size = max_size
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.executor = executor
+
+        self.queue = collections.deque()  # (transaction, encoded size, arrival time)
+        self.queued_bytes = 0
+        self.sealed_blocks = 0
+        self.failed_seals = 0
+        self.last_error = None
+
+        # Created by start(), bound to the running event loop
+        self.not_full = None
+        self.wakeup = None
+        self.sealer = None
+        self.closing = False
+
+    def __len__(self):
+        return len(self.queue)
+
+    def add(self, transaction):
+        """
+        Queues a transaction without waiting. Raises MempoolFull when there is no room.
+        """
+        if len(self.queue) >= self.max_size:
+            raise MempoolFull(f"Mempool holds {self.max_size} transactions")
+        transaction = self.blockchain.prepare_transaction(transaction)
+        size = len(transaction.encode())
+        self.queue.append((transaction, size, time.monotonic()))
+        self.queued_bytes += size
+
+    def is_seal_due(self, now=None):
+        if not self.queue:
+            return False
+        if len(self.queue) >= self.max_transactions or self.queued_bytes >= self.max_bytes:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - self.queue[0][2] >= self.max_age
+
+    def take_batch(self):
+        """
+        Removes the transactions of the next block from the queue.
+        """
+        batch = []
+        batch_bytes = 0
+        while self.queue and len(batch) < self.max_transactions:
+            transaction, size, _ = self.queue[0]
+            if batch and batch_bytes + size > self.max_bytes:
+                break
+            self.queue.popleft()
+            self.queued_bytes -= size
+            batch.append(transaction)
+            batch_bytes += size
+        return batch
+
+    def requeue(self, batch, error):
+        """
+        Puts the transactions of a batch that failed to seal back at the head of the queue.
+        The queue may briefly hold more than max_size transactions; add() waits until it drains.
+        """
+        self.last_error = error
+        self.failed_seals += 1
+        # Already due once, so they are sealed again as soon as the sealer retries
+        arrival = time.monotonic() - self.max_age
+        for transaction in reversed(batch):
+            size = len(transaction.encode())
+            self.queue.appendleft((transaction, size, arrival))
+            self.queued_bytes += size
+
+    def seal(self, batch):
+        block = self.blockchain.mine_transactions(batch, self.miner_address)
+        self.sealed_blocks += 1
+        return block
+
+    def seal_next(self):
+        batch = self.take_batch()
+        try:
+            return self.seal(batch)
+        except Exception as error:
+            self.requeue(batch, error)
+            raise
+
+    def seal_due(self):
+        """
+        Synchronously seals blocks while a threshold is reached. Returns the sealed blocks.
+        """
+        blocks = []
+        while self.is_seal_due():
+            blocks.append(self.seal_next())
+        return blocks
+
+    def flush(self):
+        """
+        Synchronously seals everything that is queued. Returns the sealed blocks.
+        """
+        blocks = []
+        while self.queue:
+            blocks.append(self.seal_next())
+        return blocks
+
+    # asyncio interface
+    async def start(self):
+        """
+        Starts the sealer task on the running event loop.
+        """
+        self.not_full = asyncio.Condition()
+        self.wakeup = asyncio.Event()
+        self.closing = False
+        self.sealer = asyncio.get_running_loop().create_task(self.run_sealer())
+
+    async def add_transaction(self, transaction):
+        """
+        Queues a transaction, waiting while the mempool is full.
+        """
+        async with self.not_full:
+            await self.not_full.wait_for(lambda: len(self.queue) < self.max_size)
+            self.add(transaction)
+        if len(self.queue) == 1 or self.is_seal_due():
+            self.wakeup.set()
+
+    async def run_sealer(self):
+        loop = asyncio.get_running_loop()
+        retry_at = None
+        while True:
+            timeout = None
+            if retry_at is not None:
+                timeout = max(0.0, retry_at - time.monotonic())
+            elif self.queue:
+                timeout = max(0.0, self.queue[0][2] + self.max_age - time.monotonic())
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            if retry_at is not None and time.monotonic() < retry_at and not self.closing:
+                continue
+            retry_at = None
+
+            while self.is_seal_due() or (self.closing and self.queue):
+                batch = self.take_batch()
+                async with self.not_full:
+                    self.not_full.notify_all()
+                try:
+                    await loop.run_in_executor(self.executor, self.seal, batch)
+                except Exception as error:
+                    # Requeued on the loop's thread, which owns the queue
+                    self.requeue(batch, error)
+                    if self.closing:
+                        raise
+                    retry_at = time.monotonic() + self.max_age
+                    break
+            if self.closing:
+                return
+
+    async def close(self):
+        """
+        Seals everything still queued and stops the sealer task.
+        """
+        self.closing = True
+        self.wakeup.set()
+        await self.sealer
+
+    def __repr__(self):
+        return (f"Mempool(queued={len(self.queue)}, queued_bytes={self.queued_bytes}, "
+                f"sealed_blocks={self.sealed_blocks}, failed_seals={self.failed_seals})")
+
+
+# Example usage
+if __name__ == "__main__":
+    from blockchain import Blockchain, Transaction
+
+    async def main():
+        my_blockchain = Blockchain(difficulty=3)
+        mempool = Mempool(my_blockchain, "Miner1", max_size=100, max_transactions=25, max_age=0.5)
+        await mempool.start()
+
+        for i in range(120):
+            await mempool.add_transaction(Transaction("Alice", "Bob", f"Data block {i}"))
+        await mempool.close()
+
+        print(mempool)
+        print(f"Blocks: {len(my_blockchain.chain)}")
+        print(f"Is Blockchain Valid? {my_blockchain.is_chain_valid()}")
+
+    asyncio.run(main())
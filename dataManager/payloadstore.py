@@ -0,0 +1,186 @@
+## Content-addressed chunk store for large transaction payloads.
+#
+## How it works:
+#	1.	A payload (bytes, str or a binary file object) is read in one streaming pass
+#	    	    and split into fixed-size chunks.
+#	2.	Each chunk is stored once under its SHA-256 digest, so identical data is
+#	    	    deduplicated across payloads and transactions.
+#	3.	A manifest lists the chunk digests of a payload. The payload is identified by
+#	    	    the Merkle root over its chunks plus its size (a PayloadRef).
+#	4.	Transactions carry only the PayloadRef, so block hashing cost no longer depends
+#	    	    on payload size. Payloads are read back lazily with open() or iter_chunks().
+#	5.	The PayloadRef records whether the payload was a str, so open() and read() give
+#	    	    text back as a str and everything else as bytes.
+#
+## Layout of a store directory:
+#	chunks/<first 2 hex digits>/<chunk digest>
+#	manifests/<payload root>
+
+import hashlib
+import io
+import os
+import tempfile
+
+from blockchain import MerkleTree, PayloadRef
+
+DIGEST_SIZE = hashlib.sha256().digest_size
+
+
+class ChunkStore:
+    def __init__(self, directory, chunk_size=1024 * 1024, threshold=64 * 1024):
+        """
+        Opens (or creates) a chunk store.
+        :param directory: Directory holding the chunks and manifests.
+        :param chunk_size: Size in bytes of each stored chunk.
+        :param threshold: Payloads smaller than this stay inline in the transaction.
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.threshold = threshold
+        os.makedirs(os.path.join(directory, "chunks"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "manifests"), exist_ok=True)
+
+    def chunk_path(self, digest_hex):
+        return os.path.join(self.directory, "chunks", digest_hex[:2], digest_hex)
+
+    def manifest_path(self, root):
+        return os.path.join(self.directory, "manifests", root)
+
+    def write_file(self, path, data):
+        # Write to a temporary file first so a crash never leaves a truncated chunk behind
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, payload, text=False):
+        """
+        Stores a payload and returns its PayloadRef.
+        :param payload: bytes, str (stored as UTF-8) or a binary file object.
+        :param text: The payload is UTF-8 text to be read back as a str; always so for a str.
+        """
+        if isinstance(payload, str):
+            payload, text = payload.encode(), True
+        stream = io.BytesIO(payload) if isinstance(payload, (bytes, bytearray, memoryview)) else payload
+
+        digests = []
+        size = 0
+        while True:
+            chunk = stream.read(self.chunk_size)
+            if not chunk:
+                break
+            digest = hashlib.sha256(chunk).digest()
+            path = self.chunk_path(digest.hex())
+            if not os.path.exists(path):
+                self.write_file(path, chunk)
+            digests.append(digest)
+            size += len(chunk)
+
+        root = MerkleTree([MerkleTree.hash_leaf(digest) for digest in digests]).root()
+        if not os.path.exists(self.manifest_path(root)):
+            self.write_file(self.manifest_path(root), b"".join(digests))
+        return PayloadRef(root, size, text)
+
+    def offload(self, data):
+        """
+        Moves data of at least `threshold` bytes into the store and returns its PayloadRef.
+        A str is measured by its UTF-8 encoding. Smaller data and anything that is not bytes
+        or str is returned unchanged.
+        """
+        if isinstance(data, str):
+            encoded = data.encode()
+            return self.put(encoded, text=True) if len(encoded) >= self.threshold else data
+        if isinstance(data, (bytes, bytearray)) and len(data) >= self.threshold:
+            return self.put(data)
+        return data
+
+    def chunk_digests(self, ref):
+        with open(self.manifest_path(ref.root), "rb") as f:
+            manifest = f.read()
+        return [manifest[pos:pos + DIGEST_SIZE] for pos in range(0, len(manifest), DIGEST_SIZE)]
+
+    def iter_chunks(self, ref, verify=True):
+        """
+        Yields the chunks of a payload in order, reading one chunk at a time.
+        :param verify: Check each chunk against its digest while reading.
+        """
+        for digest in self.chunk_digests(ref):
+            with open(self.chunk_path(digest.hex()), "rb") as f:
+                chunk = f.read()
+            if verify and hashlib.sha256(chunk).digest() != digest:
+                raise ValueError(f"Chunk {digest.hex()} of payload {ref.root} is corrupted")
+            yield chunk
+
+    def open(self, ref, verify=True):
+        """
+        Returns a file object that streams the payload from its chunks: a text stream if the
+        payload was a str, otherwise a binary one.
+        """
+        stream = io.BufferedReader(ChunkReader(self.iter_chunks(ref, verify)), buffer_size=self.chunk_size)
+        return io.TextIOWrapper(stream, encoding="utf-8", newline="") if ref.text else stream
+
+    def read(self, ref):
+        """
+        Reads a whole payload into memory, as a str if it was stored from one.
+        """
+        data = b"".join(self.iter_chunks(ref))
+        return data.decode() if ref.text else data
+
+    def verify(self, ref):
+        """
+        Checks that the stored chunks still hash to the payload's root and size.
+        """
+        digests = self.chunk_digests(ref)
+        root = MerkleTree([MerkleTree.hash_leaf(digest) for digest in digests]).root()
+        size = sum(len(chunk) for chunk in self.iter_chunks(ref))
+        return root == ref.root and size == ref.size
+
+    def __repr__(self):
+        return f"ChunkStore(directory={self.directory}, chunk_size={self.chunk_size})"
+
+
+class ChunkReader(io.RawIOBase):
+    def __init__(self, chunks):
+        """
+        Raw reader over an iterator of chunks.
+        :param chunks: Iterator yielding bytes objects.
+        """
+        self.chunks = chunks
+        self.current = b""
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self.position == len(self.current):
+            self.current = next(self.chunks, None)
+            self.position = 0
+            if self.current is None:
+                self.current = b""
+                return 0
+        count = min(len(buffer), len(self.current) - self.position)
+        buffer[:count] = self.current[self.position:self.position + count]
+        self.position += count
+        return count
+
+
+# Example usage
+if __name__ == "__main__":
+    from blockchain import Blockchain, Transaction
+
+    payloads = ChunkStore(tempfile.mkdtemp(), chunk_size=64 * 1024, threshold=1024)
+    my_blockchain = Blockchain(difficulty=3, payload_store=payloads)
+
+    dataset = os.urandom(1024 * 1024)
+    my_blockchain.add_transaction(Transaction("Alice", "Bob", dataset))
+    my_blockchain.add_transaction(Transaction("Bob", "Charlie", dataset))  # Deduplicated
+    my_blockchain.add_transaction(Transaction("Charlie", "Alice", "Small data stays inline"))
+    my_blockchain.mine_pending_transactions("Miner1")
+
+    print(f"Is Blockchain Valid? {my_blockchain.is_chain_valid()}")
+    ref = my_blockchain.get_latest_block().transactions[0].data
+    print(f"Stored payload: {ref}")
+    with payloads.open(ref) as stream:
+        print(f"Payload round-trips: {stream.read() == dataset}")
@@ -0,0 +1,243 @@
+## Block replication between nodes running blockchain.py, over plain TCP.
+#
+## Protocol:
+#	Every message is framed as [u32 length][u8 type][payload].
+#	1.	GET_TIP -> TIP: the peer's chain length and tip hash.
+#	2.	GET_HEADERS(start, count) -> HEADERS: packed BlockHeader encodings.
+#	3.	GET_BODIES(start, count) -> BODIES: the blocks in the bulk binary encoding (encode_blocks).
+#	4.	Any request the peer cannot serve is answered with ERROR(message).
+#
+## Catching up (sync_from_peer):
+#	1.	Ask for the peer's tip and check that the peer's header at our tip height is our tip.
+#	2.	Fetch the missing headers in batches and validate their hashes, proof-of-work and links.
+#	3.	Fetch the bodies in batches, with several requests in flight on the connection,
+#	    	    check every block against its header and append it to the local chain.
+#	Only the missing suffix of the chain is transferred and validated.
+#
+## How to Use:
+#	server = ReplicationServer(node_a_blockchain, ("127.0.0.1", 0))
+#	server.start()
+#	sync_from_peer(node_b_blockchain, server.address)
+
+import collections
+import socket
+import socketserver
+import struct
+import threading
+
+from blockchain import HEADER, BlockHeader, decode_blocks, encode_blocks, meets_difficulty
+
+FRAME = struct.Struct("<IB")
+RANGE = struct.Struct("<QI")  # start height, count
+TIP = struct.Struct("<Q32s")  # chain length, tip hash
+
+GET_TIP, TIP_REPLY, GET_HEADERS, HEADERS_REPLY, GET_BODIES, BODIES_REPLY, ERROR_REPLY = range(7)
+
+# Largest range a server answers in one message
+MAX_BATCH = 1024
+
+
+class ReplicationError(Exception):
+    pass
+
+
+def send_message(sock, message_type, payload=b""):
+    sock.sendall(FRAME.pack(len(payload), message_type) + payload)
+
+
+def recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        data += chunk
+    return bytes(data)
+
+
+def recv_message(sock):
+    length, message_type = FRAME.unpack(recv_exact(sock, FRAME.size))
+    return message_type, recv_exact(sock, length)
+
+
+class ReplicationHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        chain = self.server.blockchain.chain
+        while True:
+            try:
+                message_type, payload = recv_message(self.request)
+            except ConnectionError:
+                return
+            if message_type == GET_TIP:
+                tip = chain[-1]
+                send_message(self.request, TIP_REPLY, TIP.pack(len(chain), bytes.fromhex(tip.hash)))
+            elif message_type in (GET_HEADERS, GET_BODIES):
+                start, count = RANGE.unpack(payload)
+                stop = min(start + min(count, MAX_BATCH), len(chain))
+                if start >= stop:
+                    send_message(self.request, ERROR_REPLY, f"No blocks from height {start}".encode())
+                elif message_type == GET_HEADERS:
+                    headers = b"".join(chain[height].header().encode() for height in range(start, stop))
+                    send_message(self.request, HEADERS_REPLY, headers)
+                else:
+                    send_message(self.request, BODIES_REPLY, encode_blocks(chain[start:stop]))
+            else:
+                send_message(self.request, ERROR_REPLY, f"Unknown message type {message_type}".encode())
+
+
+class ReplicationServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, blockchain, address=("127.0.0.1", 0)):
+        """
+        Serves the blocks of a local chain to peers.
+        :param blockchain: Blockchain whose blocks are served.
+        :param address: (host, port) to listen on; port 0 picks a free port.
+        """
+        super().__init__(address, ReplicationHandler)
+        self.blockchain = blockchain
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.server_address[:2]
+
+    def start(self):
+        """
+        Serves requests on a background thread.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class PeerConnection:
+    def __init__(self, address, timeout=30.0):
+        """
+        Client side of a replication connection.
+        :param address: (host, port) of the peer.
+        """
+        self.sock = socket.create_connection(address, timeout=timeout)
+
+    def request(self, message_type, payload=b""):
+        send_message(self.sock, message_type, payload)
+
+    def reply(self, expected_type):
+        message_type, payload = recv_message(self.sock)
+        if message_type == ERROR_REPLY:
+            raise ReplicationError(payload.decode())
+        if message_type != expected_type:
+            raise ReplicationError(f"Expected message type {expected_type}, got {message_type}")
+        return payload
+
+    def tip(self):
+        self.request(GET_TIP)
+        length, tip_hash = TIP.unpack(self.reply(TIP_REPLY))
+        return length, tip_hash.hex()
+
+    def fetch_ranges(self, message_type, reply_type, start, stop, batch_size, pipeline):
+        """
+        Yields (start height, count, payload) for consecutive ranges covering [start, stop),
+        keeping up to `pipeline` requests in flight.
+        """
+        outstanding = collections.deque()
+        next_start = start
+        while next_start < stop or outstanding:
+            while next_start < stop and len(outstanding) < pipeline:
+                count = min(batch_size, stop - next_start)
+                self.request(message_type, RANGE.pack(next_start, count))
+                outstanding.append((next_start, count))
+                next_start += count
+            start_height, count = outstanding.popleft()
+            yield start_height, count, self.reply(reply_type)
+
+    def close(self):
+        self.sock.close()
+
+
+def sync_from_peer(blockchain, address, batch_size=256, pipeline=4):
+    """
+    Appends the blocks a peer has beyond the local tip.
+    :param blockchain: Local Blockchain to extend.
+    :param address: (host, port) of a ReplicationServer.
+    :param batch_size: Headers or bodies requested per message (at most MAX_BATCH).
+    :param pipeline: Number of requests kept in flight.
+    :return: Number of blocks appended.
+    """
+    batch_size = min(batch_size, MAX_BATCH)
+    peer = PeerConnection(address)
+    try:
+        peer_length, _ = peer.tip()
+        local_length = len(blockchain.chain)
+        if peer_length <= local_length:
+            return 0
+
+        # The peer's header at our tip height must be our tip, otherwise the chains have forked
+        local_tip = blockchain.get_latest_block()
+        peer.request(GET_HEADERS, RANGE.pack(local_length - 1, 1))
+        if BlockHeader.decode(peer.reply(HEADERS_REPLY)).hash != local_tip.hash:
+            raise ReplicationError(f"Peer chain does not contain the local tip {local_tip.hash}")
+
+        headers = []
+        previous_hash = local_tip.hash
+        for _, _, payload in peer.fetch_ranges(GET_HEADERS, HEADERS_REPLY, local_length, peer_length,
+                                               batch_size, pipeline):
+            for offset in range(0, len(payload), HEADER.size):
+                header = BlockHeader.decode(payload, offset)
+                height = local_length + len(headers)
+                if header.previous_hash != previous_hash:
+                    raise ReplicationError(f"Header at height {height} does not link to its predecessor")
+                if header.hash != header.calculate_hash():
+                    raise ReplicationError(f"Header at height {height} does not match its content")
+                if not meets_difficulty(bytes.fromhex(header.hash), blockchain.difficulty):
+                    raise ReplicationError(f"Header at height {height} does not meet the difficulty")
+                headers.append(header)
+                previous_hash = header.hash
+        if len(headers) != peer_length - local_length:
+            raise ReplicationError("Peer returned fewer headers than it advertised")
+
+        appended = 0
+        for start, count, payload in peer.fetch_ranges(GET_BODIES, BODIES_REPLY, local_length, peer_length,
+                                                       batch_size, pipeline):
+            blocks = decode_blocks(payload)
+            if len(blocks) != count:
+                raise ReplicationError(f"Peer returned {len(blocks)} of {count} blocks from height {start}")
+            for offset, block in enumerate(blocks):
+                height = start + offset
+                header = headers[height - local_length]
+                # The decoded block's Merkle tree is rebuilt from its transactions, so this also
+                # checks the body against the header's Merkle root
+                if block.hash != header.hash or block.calculate_hash() != header.hash:
+                    raise ReplicationError(f"Body at height {height} does not match its header")
+                blockchain.append_block(block)
+                appended += 1
+        return appended
+    finally:
+        peer.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    from blockchain import Blockchain, Transaction
+
+    node_a = Blockchain(difficulty=2)
+    for i in range(20):
+        node_a.add_transaction(Transaction("Alice", "Bob", f"Data block {i}"))
+        node_a.mine_pending_transactions("Miner1")
+
+    # Node B shares node A's genesis block and a prefix of its chain
+    node_b = Blockchain(difficulty=2)
+    node_b.chain = list(node_a.chain[:5])
+
+    server = ReplicationServer(node_a)
+    server.start()
+    appended = sync_from_peer(node_b, server.address, batch_size=4)
+    server.stop()
+
+    print(f"Blocks fetched: {appended}")
+    print(f"Same tip: {node_b.get_latest_block().hash == node_a.get_latest_block().hash}")
+    print(f"Is Blockchain Valid? {node_b.is_chain_valid()}")
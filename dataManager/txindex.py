@@ -0,0 +1,138 @@
+## Secondary indexes over the blocks of blockchain.py.
+#
+## Indexes:
+#	1.	Block hash -> height.
+#	2.	Sender -> postings and recipient -> postings, where a posting is the
+#	    	    (height, position) of a transaction inside the chain.
+#
+## Behaviour:
+#	1.	Blockchain(index=TransactionIndex()) keeps the index up to date as blocks are mined.
+#	2.	The index can be rebuilt from a chain at any time and snapshotted to a JSON file.
+#	    	    A snapshot is only reused if the block it ends at is still in the chain;
+#	    	    blocks appended since the snapshot are indexed on load.
+#	3.	Blockchain.find_transactions() and get_block_by_hash() use the index and only
+#	    	    load the blocks that hold matching transactions.
+
+import json
+import os
+
+
+class TransactionIndex:
+    def __init__(self):
+        self.hashes = []  # height -> block hash
+        self.heights = {}  # block hash -> height
+        self.by_sender = {}  # sender -> [(height, position), ...]
+        self.by_recipient = {}  # recipient -> [(height, position), ...]
+
+    def add_block(self, height, block):
+        """
+        Indexes a block appended at the given height.
+        """
+        if height != len(self.hashes):
+            raise ValueError(f"Expected block at height {len(self.hashes)}, got {height}")
+        self.hashes.append(block.hash)
+        self.heights[block.hash] = height
+        for position, tx in enumerate(block.transactions):
+            self.by_sender.setdefault(tx.sender, []).append((height, position))
+            self.by_recipient.setdefault(tx.recipient, []).append((height, position))
+
+    def catch_up(self, chain):
+        """
+        Indexes the blocks of `chain` above the last indexed height. If the indexed blocks
+        are no longer the chain's blocks, the index is rebuilt from scratch.
+        """
+        if self.hashes and (len(self.hashes) > len(chain) or chain[len(self.hashes) - 1].hash != self.hashes[-1]):
+            self.clear()
+        for height in range(len(self.hashes), len(chain)):
+            self.add_block(height, chain[height])
+
+    def rebuild(self, chain):
+        self.clear()
+        self.catch_up(chain)
+
+    def clear(self):
+        self.hashes = []
+        self.heights = {}
+        self.by_sender = {}
+        self.by_recipient = {}
+
+    def height_of(self, block_hash):
+        return self.heights.get(block_hash)
+
+    def postings(self, sender=None, recipient=None):
+        """
+        Returns the (height, position) postings matching both filters, in chain order.
+        """
+        if sender is None and recipient is None:
+            raise ValueError("Give a sender, a recipient or both")
+        if recipient is None:
+            return self.by_sender.get(sender, [])
+        if sender is None:
+            return self.by_recipient.get(recipient, [])
+        # Intersect starting from the shorter posting list
+        first = self.by_sender.get(sender, [])
+        second = self.by_recipient.get(recipient, [])
+        if len(second) < len(first):
+            first, second = second, first
+        wanted = set(first)
+        return [posting for posting in second if posting in wanted]
+
+    def save(self, path):
+        """
+        Writes a snapshot of the index to `path`.
+        """
+        snapshot = {
+            "hashes": self.hashes,
+            "by_sender": list(self.by_sender.items()),
+            "by_recipient": list(self.by_recipient.items()),
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, chain=None):
+        """
+        Reads a snapshot written by save(). If a chain is given, the index is caught up with it.
+        """
+        index = cls()
+        if os.path.exists(path):
+            with open(path) as f:
+                snapshot = json.load(f)
+            index.hashes = snapshot["hashes"]
+            index.heights = {block_hash: height for height, block_hash in enumerate(index.hashes)}
+            index.by_sender = {key: [tuple(p) for p in postings] for key, postings in snapshot["by_sender"]}
+            index.by_recipient = {key: [tuple(p) for p in postings] for key, postings in snapshot["by_recipient"]}
+        if chain is not None:
+            index.catch_up(chain)
+        return index
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __repr__(self):
+        return (f"TransactionIndex(blocks={len(self.hashes)}, senders={len(self.by_sender)}, "
+                f"recipients={len(self.by_recipient)})")
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    from blockchain import Blockchain, Transaction
+
+    my_blockchain = Blockchain(difficulty=2, index=TransactionIndex())
+    my_blockchain.add_transaction(Transaction("Alice", "Bob", "Data block 1"))
+    my_blockchain.add_transaction(Transaction("Bob", "Charlie", "Data block 2"))
+    my_blockchain.mine_pending_transactions("Miner1")
+    my_blockchain.add_transaction(Transaction("Alice", "Charlie", "Data block 3"))
+    my_blockchain.mine_pending_transactions("Miner2")
+
+    print("Sent by Alice:", list(my_blockchain.find_transactions(sender="Alice")))
+    print("Alice -> Charlie:", list(my_blockchain.find_transactions(sender="Alice", recipient="Charlie")))
+    tip = my_blockchain.get_latest_block().hash
+    print("Block by hash:", my_blockchain.get_block_by_hash(tip))
+
+    snapshot_path = os.path.join(tempfile.mkdtemp(), "index.json")
+    my_blockchain.index.save(snapshot_path)
+    print("Reloaded:", TransactionIndex.load(snapshot_path, my_blockchain.chain))